@@ -1,28 +1,181 @@
 # app/database.py
+import threading
+import time
+from typing import Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 
+# Async drivers for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a DATABASE_URL onto the async driver for its backend."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    """Checkout counters and timings for one engine's pool."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checkout_total = 0.0
+        self.checkout_max = 0.0
+    
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+    
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_total += seconds
+            self.checkout_max = max(self.checkout_max, seconds)
+    
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+    
+    def snapshot(self, pool: QueuePool) -> Dict[str, float]:
+        """Live pool occupancy plus checkout timings in milliseconds."""
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": 1000 * self.wait_total / checkouts if checkouts else 0.0,
+                "wait_max_ms": 1000 * self.wait_max,
+                "checkout_avg_ms": 1000 * self.checkout_total / checkouts if checkouts else 0.0,
+                "checkout_max_ms": 1000 * self.checkout_max,
+            }
+
+
+def metered_pool_class(pool_class):
+    """
+    Subclass a QueuePool class so every checkout is timed.
+    
+    Wait time covers getting a connection out of the pool: queueing for a
+    free one or opening a new one. Checkout latency adds pre-ping and
+    checkout handlers on top. Metrics live on the class, so they survive
+    `engine.dispose()` recreating the pool.
+    """
+    class MeteredPool(pool_class):
+        metrics = PoolMetrics()
+        
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                self.metrics.record_timeout()
+                raise
+            finally:
+                self.metrics.record_wait(time.perf_counter() - start)
+        
+        def connect(self):
+            start = time.perf_counter()
+            connection = super().connect()
+            self.metrics.record_checkout(time.perf_counter() - start)
+            return connection
+    
+    MeteredPool.__name__ = f"Metered{pool_class.__name__}"
+    return MeteredPool
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool and logging options from settings, for create_engine/create_async_engine."""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "echo": settings.DB_ECHO,
+    }
+    # Sizing and metrics only apply to server pools; SQLite picks its own pool class
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update({
+            "poolclass": metered_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool),
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        })
+    return options
+
+
+def pool_stats(engine_to_report) -> dict:
+    """Pool occupancy and checkout timings for an engine (sync or async)."""
+    pool = engine_to_report.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"metered": False, "status": pool.status()}
+    return {"metered": True, **metrics.snapshot(pool)}
+
+
 # Create database engine
 # psycopg3 works with standard postgresql:// URLs
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
+# The synchronous engine is kept for scripts (seed data, diagnostics)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+# Async engine used by the API; queries never block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, is_async=True)
 )
 
-# Create session factory
+# Optional read replica; app/utils/read_replica.py decides when to use it
+replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        async_database_url(settings.DATABASE_REPLICA_URL),
+        **engine_options(settings.DATABASE_REPLICA_URL, is_async=True)
+    )
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes stay readable after commit without
+# an implicit (and, under asyncio, impossible) lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+    if replica_engine is not None else None
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-# Dependency for getting DB session
+# Dependency for getting DB session (synchronous; scripts only)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# Dependency for getting an async DB session (all API routes)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,8 +1,8 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum, Date
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import datetime, timezone
 import enum
 
 from app.database import Base
@@ -34,6 +34,8 @@ class User(Base):
     phone = Column(String)
     role = Column(Enum(UserRole), default=UserRole.CUSTOMER)
     is_active = Column(Boolean, default=True)
+    # Carried in access tokens; bumping it revokes every token issued so far
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -41,6 +43,10 @@ class User(Base):
     reservations = relationship("Reservation", back_populates="user")
 
 
+# Added after the users table shipped; main.py adds them on startup if missing
+USER_ADDED_COLUMNS = ("token_version",)
+
+
 class Category(Base):
     __tablename__ = "categories"
     
@@ -75,6 +81,14 @@ class MenuItem(Base):
     order_items = relationship("OrderItem", back_populates="menu_item")
 
 
+# Added after the orders table shipped; main.py creates them on startup if missing
+ORDER_HISTORY_INDEXES = (
+    "ix_orders_customer_id_created_at",
+    "ix_orders_status_created_at",
+    "ix_orders_created_at_id",
+)
+
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -88,11 +102,24 @@ class Order(Base):
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     total_amount = Column(Float, nullable=False)
     notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Client-side default keeps the stored value in the same format as the
+    # (created_at, id) pagination cursor that is compared against it
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     customer = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    # Composite indexes backing keyset pagination of order history
+    __table_args__ = (
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
 
 
 class OrderItem(Base):
@@ -109,6 +136,90 @@ class OrderItem(Base):
     menu_item = relationship("MenuItem", back_populates="order_items")
 
 
+class ArchivedOrder(Base):
+    """Finished order moved out of the hot `orders` table by app/utils/archive.py."""
+    __tablename__ = "orders_archive"
+    
+    id = Column(Integer, primary_key=True)
+    order_number = Column(String, unique=True, nullable=False)
+    customer_id = Column(Integer, ForeignKey("users.id"))
+    table_number = Column(String)
+    guest_name = Column(String)
+    order_type = Column(String)
+    status = Column(Enum(OrderStatus))
+    total_amount = Column(Float, nullable=False)
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    order_items = relationship("ArchivedOrderItem", back_populates="order")
+    
+    __table_args__ = (
+        Index("ix_orders_archive_customer_id_created_at", "customer_id", "created_at", "id"),
+        Index("ix_orders_archive_status_created_at", "status", "created_at", "id"),
+        Index("ix_orders_archive_created_at_id", "created_at", "id"),
+    )
+
+
+class ArchivedOrderItem(Base):
+    """Line of an ArchivedOrder."""
+    __tablename__ = "order_items_archive"
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders_archive.id"), index=True)
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
+    quantity = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)
+    special_instructions = Column(Text)
+    
+    order = relationship("ArchivedOrder", back_populates="order_items")
+    menu_item = relationship("MenuItem", viewonly=True)
+
+
+class OrderNumberBlock(Base):
+    """Single-row counter that hands out blocks of order-number sequence values."""
+    __tablename__ = "order_number_blocks"
+    
+    id = Column(Integer, primary_key=True)
+    next_value = Column(Integer, nullable=False)
+
+
+class IdempotencyRecord(Base):
+    """Stored response for an Idempotency-Key (database idempotency backend)."""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String, primary_key=True)
+    status_code = Column(Integer)  # NULL while the first request is in flight
+    response_body = Column(Text)
+    request_fingerprint = Column(String)  # digest of the request body that claimed the key
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# Added after the idempotency_keys table shipped; main.py adds them on startup if missing
+IDEMPOTENCY_ADDED_COLUMNS = ("request_fingerprint",)
+
+
+class RefreshToken(Base):
+    """Server-side record of a refresh token; only its SHA-256 is stored."""
+    __tablename__ = "refresh_tokens"
+    
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)  # every rotation of one login
+    rotated = Column(Boolean, nullable=False, default=False)  # kept until expiry to detect reuse
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RateLimitCounter(Base):
+    """Hits of one rate-limit key in one fixed window (database rate-limit backend)."""
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String, primary_key=True)
+    window_start = Column(Integer, primary_key=True, index=True)  # window number since the epoch
+    count = Column(Integer, nullable=False, default=0)
+
+
 class Restaurant(Base):
     __tablename__ = "restaurant_info"
     
@@ -1,29 +1,40 @@
 # app/routers/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
+from typing import Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
-from app.schemas import UserCreate, UserLogin, UserResponse, Token, UserUpdate
+from app.schemas import UserCreate, UserLogin, UserResponse, Token, UserUpdate, UserAccessUpdate, RefreshRequest
 from app.utils.auth import (
-    get_password_hash,
-    verify_password,
     create_access_token,
-    get_current_active_user
+    get_admin_user,
+    get_current_user_record,
+    revoke_tokens,
+    token_claims
 )
+from app.utils.password_hashing import password_hasher
+from app.utils.rate_limit import login_throttle
+from app.utils.refresh_tokens import refresh_token_store
+from app.utils.user_cache import UserSnapshot, invalidate_user
 from app.config import settings
 
 router = APIRouter()
 
+# Verified against when the email is unknown, so a miss costs the same bcrypt
+# time as a wrong password and response times don't reveal which emails exist
+DUMMY_PASSWORD_HASH = "$2b$12$hGvbfMIF0zw18V3VJz61Ge/CDx6sEs0QVmIS8sudQULDoJaI8TyRu"
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter(
+    existing_user = await db.scalar(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    ))
     
     if existing_user:
         raise HTTPException(
@@ -32,7 +43,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -42,19 +53,26 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(request: Request, credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return JWT token."""
+    # Throttle before any lookup or hash
+    await login_throttle.check(request.client.host if request.client else None, credentials.email, db)
+    
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await db.scalar(select(User).where(User.email == credentials.email))
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    password_ok = await password_hasher.verify(
+        credentials.password,
+        user.hashed_password if user else DUMMY_PASSWORD_HASH
+    )
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -70,29 +88,62 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
+    refresh_token = await refresh_token_store.issue(db, user.id)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Trade a refresh token for a new access token and refresh token, without the password."""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    rotated = await refresh_token_store.rotate(db, request.refresh_token)
+    if rotated is None:
+        raise invalid_token
+    user_id, refresh_token = rotated
+    
+    # Claims come from the current row, so role changes apply at the next refresh
+    user = await db.get(User, user_id)
+    if user is None or not user.is_active:
+        await refresh_token_store.revoke(db, refresh_token)
+        raise invalid_token
+    
+    access_token = create_access_token(
+        data=token_claims(user),
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """Get current authenticated user information."""
     return current_user
 
 
 @router.post("/logout")
-async def logout():
-    """Logout endpoint (token invalidation handled client-side)."""
+async def logout(request: Optional[RefreshRequest] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Revoke the refresh token, if one is sent (and every rotation of it);
+    the access token expires on its own. Clients may still log out without a body.
+    """
+    if request is not None:
+        await refresh_token_store.revoke(db, request.refresh_token)
     return {"message": "Successfully logged out"}
 
 @router.put("/profile", response_model=dict)
 async def update_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user profile (full_name and phone)
@@ -104,8 +155,9 @@ async def update_profile(
         if user_update.phone is not None:
             current_user.phone = user_update.phone
         
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        invalidate_user(current_user)
+        await db.refresh(current_user)
         
         # Return updated user data
         return {
@@ -119,5 +171,36 @@ async def update_profile(
             "created_at": current_user.created_at.isoformat() if current_user.created_at else None
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
+
+
+@router.put("/users/{user_id}/access", response_model=UserResponse)
+async def update_user_access(
+    user_id: int,
+    access_update: UserAccessUpdate,
+    current_user: UserSnapshot = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change a user's role or active flag (admin only); their existing tokens stop working."""
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    changes = access_update.model_dump(exclude_unset=True, exclude_none=True)
+    if any(getattr(user, field) != value for field, value in changes.items()):
+        for field, value in changes.items():
+            setattr(user, field, value)
+        revoke_tokens(user)
+        if not user.is_active:
+            await refresh_token_store.revoke_user(db, user.id)
+        await db.commit()
+        invalidate_user(user)
+        await db.refresh(user)
+    
+    return user
+
+@router.get("/hash-pool")
+async def get_hash_pool_stats(current_user: UserSnapshot = Depends(get_admin_user)):
+    """Password hashing pool occupancy and queue depth for this worker (admin only)."""
+    return password_hasher.stats()
@@ -1,22 +1,66 @@
 # app/routers/menu.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timezone
 from typing import List, Optional
 
-from app.database import get_db
-from app.models import MenuItem, Category, User
+from app.config import settings
+from app.database import get_async_db
+from app.models import MenuItem, Category
 from app.schemas import (
     MenuItemCreate,
     MenuItemUpdate,
     MenuItemResponse,
+    MenuAvailabilityUpdate,
+    MenuAvailabilityChange,
     CategoryCreate,
-    CategoryResponse
+    CategoryResponse,
+    CategorySummary,
+    MenuImportReport,
+    MenuSearchResponse,
+    MenuSnapshotCategory
 )
 from app.utils.auth import get_current_active_user, get_admin_user
+from app.utils.menu_cache import SerializedBody, invalidate_menu_caches, menu_snapshot
+from app.utils.menu_search import SearchFilters, menu_search
+from app.utils.menu_transfer import MEDIA_TYPES, TransferFormat, TransferKind, export_rows, import_rows
+from app.utils.read_replica import get_read_db
+from app.utils.user_cache import UserSnapshot
+from app.websocket import manager
 
 router = APIRouter()
 
 
+def menu_items_query():
+    """
+    MenuItems with their category joined in, as MenuItemResponse needs:
+    one statement however many items, and no lazy load per row.
+    """
+    return select(MenuItem).options(joinedload(MenuItem.category))
+
+
+async def load_menu_item(db: AsyncSession, item_id: int) -> Optional[MenuItem]:
+    """Fetch a menu item with its category."""
+    return await db.scalar(
+        menu_items_query()
+        .where(MenuItem.id == item_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+def snapshot_response(request: Request, body: SerializedBody) -> Response:
+    """Serve a pre-serialized body, or 304 if the client already has it."""
+    headers = {"ETag": body.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if body.etag in client_etags or "*" in client_etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body.content, media_type="application/json", headers=headers)
+
+
 # ============ MENU ITEMS ============
 @router.get("", response_model=List[MenuItemResponse])
 async def get_menu_items(
@@ -25,26 +69,69 @@ async def get_menu_items(
     is_vegetarian: Optional[bool] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all menu items with optional filters."""
-    query = db.query(MenuItem)
+    query = menu_items_query()
     
     if category_id:
-        query = query.filter(MenuItem.category_id == category_id)
+        query = query.where(MenuItem.category_id == category_id)
     if is_available is not None:
-        query = query.filter(MenuItem.is_available == is_available)
+        query = query.where(MenuItem.is_available == is_available)
     if is_vegetarian is not None:
-        query = query.filter(MenuItem.is_vegetarian == is_vegetarian)
+        query = query.where(MenuItem.is_vegetarian == is_vegetarian)
     
-    menu_items = query.offset(skip).limit(limit).all()
+    menu_items = (await db.scalars(query.order_by(MenuItem.id).offset(skip).limit(limit))).all()
     return menu_items
 
 
+# The snapshot is built from the primary: a replica read right after a
+# write could install a stale snapshot until the TTL expires
+@router.get("/snapshot", response_model=List[MenuSnapshotCategory])
+async def get_menu_snapshot(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Full menu (active categories with their items) from memory, with ETag/304 support."""
+    snapshot = await menu_snapshot.get(db)
+    return snapshot_response(request, snapshot.menu)
+
+
+@router.get("/search", response_model=MenuSearchResponse)
+async def search_menu(
+    q: str = "",
+    vegetarian: Optional[bool] = None,
+    spicy: Optional[bool] = None,
+    available: Optional[bool] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_calories: Optional[int] = Query(None, ge=0),
+    max_calories: Optional[int] = Query(None, ge=0),
+    max_preparation_time: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Search menu item names and descriptions (prefix and typo tolerant) with
+    facet filters. Served from the in-memory index; facets count every hit.
+    """
+    filters = SearchFilters(
+        vegetarian=vegetarian,
+        spicy=spicy,
+        available=available,
+        min_price=min_price,
+        max_price=max_price,
+        min_calories=min_calories,
+        max_calories=max_calories,
+        max_preparation_time=max_preparation_time
+    )
+    hits, facets = menu_search.search(q, filters, limit)
+    return {
+        "items": [{**doc._asdict(), "score": score} for doc, score in hits],
+        "facets": facets
+    }
+
+
 @router.get("/{item_id}", response_model=MenuItemResponse)
-async def get_menu_item(item_id: int, db: Session = Depends(get_db)):
+async def get_menu_item(item_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get a specific menu item by ID."""
-    item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+    item = await load_menu_item(db, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,12 +143,12 @@ async def get_menu_item(item_id: int, db: Session = Depends(get_db)):
 @router.post("", response_model=MenuItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_menu_item(
     item_data: MenuItemCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Create a new menu item (Admin only)."""
     # Verify category exists
-    category = db.query(Category).filter(Category.id == item_data.category_id).first()
+    category = await db.get(Category, item_data.category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,20 +157,22 @@ async def create_menu_item(
     
     new_item = MenuItem(**item_data.model_dump())
     db.add(new_item)
-    db.commit()
-    db.refresh(new_item)
-    return new_item
+    await db.commit()
+    invalidate_menu_caches()
+    item = await load_menu_item(db, new_item.id)
+    menu_search.upsert(item)
+    return item
 
 
 @router.put("/{item_id}", response_model=MenuItemResponse)
 async def update_menu_item(
     item_id: int,
     item_data: MenuItemUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Update a menu item (Admin only)."""
-    item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+    item = await db.get(MenuItem, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,47 +184,103 @@ async def update_menu_item(
     for key, value in update_data.items():
         setattr(item, key, value)
     
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    invalidate_menu_caches()
+    item = await load_menu_item(db, item.id)
+    menu_search.upsert(item)
     return item
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_menu_item(
     item_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Delete a menu item (Admin only)."""
-    item = db.query(MenuItem).filter(MenuItem.id == item_id).first()
+    item = await db.get(MenuItem, item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Menu item not found"
         )
     
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
+    invalidate_menu_caches()
+    menu_search.remove(item_id)
     return None
 
 
+@router.patch("/availability", response_model=MenuAvailabilityChange)
+async def bulk_update_availability(
+    availability: MenuAvailabilityUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
+):
+    """
+    Mark many menu items available or sold out in one UPDATE (Admin only).
+    
+    All items change or none do. Every connected client gets one
+    `menu_availability_updated` delta to patch its local menu with.
+    """
+    item_ids = sorted(set(availability.item_ids))
+    updated_at = datetime.now(timezone.utc)
+    
+    result = await db.execute(
+        update(MenuItem)
+        .where(MenuItem.id.in_(item_ids))
+        .values(is_available=availability.is_available, updated_at=updated_at)
+        .returning(MenuItem.id)
+        .execution_options(synchronize_session=False)
+    )
+    missing = set(item_ids) - set(result.scalars().all())
+    if missing:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Menu items not found: {sorted(missing)}"
+        )
+    await db.commit()
+    invalidate_menu_caches()
+    menu_search.set_available(item_ids, availability.is_available)
+    
+    change = {
+        "item_ids": item_ids,
+        "is_available": availability.is_available,
+        "updated_at": updated_at.isoformat()
+    }
+    await manager.broadcast_to_all({"type": "menu_availability_updated", **change})
+    return change
+
+
 # ============ CATEGORIES ============
 @router.get("/categories/all", response_model=List[CategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
-    """Get all menu categories."""
-    categories = db.query(Category).filter(Category.is_active == True).all()
-    return categories
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get all menu categories (served from the menu snapshot)."""
+    snapshot = await menu_snapshot.get(db)
+    return snapshot_response(request, snapshot.categories)
+
+
+@router.get("/categories/summary", response_model=List[CategorySummary])
+async def get_category_summaries(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Active categories with their total, available and vegetarian item counts
+    and price range (served from the menu snapshot).
+    """
+    snapshot = await menu_snapshot.get(db)
+    return snapshot_response(request, snapshot.summaries)
 
 
 @router.post("/categories", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Create a new category (Admin only)."""
     # Check if category already exists
-    existing = db.query(Category).filter(Category.name == category_data.name).first()
+    existing = await db.scalar(select(Category).where(Category.name == category_data.name))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,6 +289,45 @@ async def create_category(
     
     new_category = Category(**category_data.model_dump())
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    invalidate_menu_caches()
+    await db.refresh(new_category)
     return new_category
+
+
+
+# ============ BULK IMPORT / EXPORT ============
+@router.post("/import/{kind}", response_model=MenuImportReport)
+async def import_menu(
+    kind: TransferKind,
+    request: Request,
+    format: TransferFormat = "csv",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
+):
+    """
+    Upsert categories or menu items from a CSV or NDJSON request body (Admin only).
+    
+    Categories match by name, items by category name and item name. Invalid
+    rows are skipped and listed in the report; the rest commit together.
+    """
+    report = await import_rows(db, kind, format, request.stream(), settings.MENU_TRANSFER_BATCH_SIZE)
+    invalidate_menu_caches()
+    if kind == "items":
+        await menu_search.rebuild(db)
+    return report
+
+
+@router.get("/export/{kind}")
+async def export_menu(
+    kind: TransferKind,
+    format: TransferFormat = "csv",
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
+):
+    """Stream all categories or menu items as CSV or NDJSON, in the import format (Admin only)."""
+    return StreamingResponse(
+        export_rows(db.bind, kind, format, settings.MENU_TRANSFER_BATCH_SIZE),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="menu-{kind}.{format}"'}
+    )
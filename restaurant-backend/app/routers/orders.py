@@ -4,50 +4,89 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 # app/routers/orders.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
-from typing import List, Optional
-from datetime import datetime
-import random
-import string
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, cast, insert, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import base64
+import json
+
+from app.config import settings
+from app.database import get_async_db
 from app.utils.auth import get_current_active_user
-from app.models import Order, OrderItem, MenuItem, User, OrderStatus
-from app.schemas import OrderCreate, OrderResponse, OrderStatusUpdate
+from app.models import Order, OrderItem, MenuItem, OrderStatus, ArchivedOrder, ArchivedOrderItem
+from app.schemas import (
+    OrderCreate,
+    OrderItemCreate,
+    OrderResponse,
+    OrderStatusUpdate,
+    OrderStatusBulkUpdate,
+    OrderStatusChange,
+    GuestOrderCreate,
+    GuestOrderResponse
+)
 from app.utils.auth import get_current_active_user, get_admin_user, get_current_user
+from app.utils.archive import archive_orders
+from app.utils.idempotency import idempotent_request, request_fingerprint
+from app.utils.menu_cache import price_table
+from app.utils.kitchen_queue import kitchen_entry, kitchen_queue
+from app.utils.order_cache import tracking_cache
+from app.utils.order_number import order_numbers
+from app.utils.read_replica import get_read_db, is_replica_session, read_lag_bound
+from app.utils.user_cache import UserSnapshot
 from app.websocket import manager
 
 router = APIRouter()
 
+# Orders in these states never change again, so their event streams end
+FINISHED_STATUSES = {OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value}
 
-def generate_order_number() -> str:
-    """Generate a unique order number."""
-    timestamp = datetime.now().strftime("%Y%m%d")
-    random_part = ''.join(random.choices(string.digits, k=4))
-    return f"ORD-{timestamp}-{random_part}"
 
+async def generate_order_number(db: AsyncSession) -> str:
+    """Generate a unique order number from this worker's sequence block."""
+    return await order_numbers.next(db.bind)
 
-@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(
-    order_data: OrderCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Create a new order."""
-    if not order_data.items:
+
+def order_lines_loader(model, item_model):
+    """Eager-load an order's lines with their menu items and categories for OrderResponse."""
+    return selectinload(model.order_items).joinedload(item_model.menu_item).joinedload(MenuItem.category)
+
+
+def encode_order_cursor(order: Order) -> str:
+    """Encode an order's (created_at, id) position as an opaque page cursor."""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_order_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order must contain at least one item"
+            detail="Invalid cursor"
         )
+
+
+def price_order_lines(items: List[OrderItemCreate], menu_items: dict) -> Tuple[float, List[dict]]:
+    """
+    Validate cart lines against resolved menu items and price them.
     
-    # Calculate total and validate items
+    Returns the order total and the OrderItem rows to insert. Raises 404 for
+    the first unknown item and 400 for the first unavailable one, in cart order.
+    """
     total_amount = 0.0
     order_items_data = []
     
-    for item_data in order_data.items:
-        menu_item = db.query(MenuItem).filter(MenuItem.id == item_data.menu_item_id).first()
+    for item_data in items:
+        menu_item = menu_items.get(item_data.menu_item_id)
         if not menu_item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -69,124 +108,244 @@ async def create_order(
             "special_instructions": item_data.special_instructions
         })
     
-    # Create order
-    new_order = Order(
-        order_number=generate_order_number(),
-        customer_id=current_user.id,
-        table_number=order_data.table_number,
-        total_amount=total_amount,
-        notes=order_data.notes,
-        status=OrderStatus.PENDING
-    )
+    return total_amount, order_items_data
+
+
+def serialize_order_items(order: Order) -> List[dict]:
+    """Render an order's eager-loaded lines for the tracking/history payloads."""
+    return [
+        {
+            "menu_item_id": item.menu_item_id,
+            "name": item.menu_item.name if item.menu_item else "Unknown Item",
+            "quantity": item.quantity,
+            "price": float(item.price)
+        }
+        for item in order.order_items
+    ]
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Create a new order.
     
-    db.add(new_order)
-    db.flush()  # Get the order ID
+    Retries carrying the same `Idempotency-Key` header replay the first response.
+    """
+    scope = f"orders:user:{current_user.id}"
+    async with idempotent_request(idempotency_key, scope, db, request_fingerprint(order_data)) as claim:
+        if claim.replay:
+            return claim.replay
+        
+        if not order_data.items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Order must contain at least one item"
+            )
+        
+        # Resolve price and availability for every line in one query
+        requested_ids = {item_data.menu_item_id for item_data in order_data.items}
+        menu_items = {
+            menu_item.id: menu_item
+            for menu_item in await db.scalars(select(MenuItem).where(MenuItem.id.in_(requested_ids)))
+        }
+        
+        total_amount, order_items_data = price_order_lines(order_data.items, menu_items)
+        
+        # Create order
+        new_order = Order(
+            order_number=await generate_order_number(db),
+            customer_id=current_user.id,
+            table_number=order_data.table_number,
+            total_amount=total_amount,
+            notes=order_data.notes,
+            status=OrderStatus.PENDING
+        )
+        
+        db.add(new_order)
+        await db.flush()  # Get the order ID
+        
+        # Create all order items with a single bulk INSERT
+        for item_data in order_items_data:
+            item_data["order_id"] = new_order.id
+        await db.execute(insert(OrderItem), order_items_data)
+        
+        await db.commit()
+        tracking_cache.invalidate(new_order.order_number)
+        
+        # Reload the order with its lines in one query for the response
+        new_order = (await db.scalars(select(Order).options(
+            joinedload(Order.order_items).joinedload(OrderItem.menu_item).joinedload(MenuItem.category)
+        ).where(Order.id == new_order.id))).unique().one()
+        
+        kitchen_queue.add(kitchen_entry(new_order))
+        
+        # Broadcast new order to admins via WebSocket
+        await manager.broadcast_new_order({
+            "type": "new_order",
+            "order": {
+                "id": new_order.id,
+                "order_number": new_order.order_number,
+                "customer_id": new_order.customer_id,
+                "table_number": new_order.table_number,
+                "total_amount": new_order.total_amount,
+                "status": new_order.status.value,
+                "created_at": new_order.created_at.isoformat()
+            }
+        })
+        
+        body = OrderResponse.model_validate(new_order).model_dump(mode="json")
+        claim.save(status.HTTP_201_CREATED, body)
+        return body
+
+
+def order_history_query(model, item_model, current_user: UserSnapshot, order_status, position):
+    """Newest-first history query on `orders` or `orders_archive`."""
+    query = select(model)
     
-    # Create order items
-    for item_data in order_items_data:
-        order_item = OrderItem(order_id=new_order.id, **item_data)
-        db.add(order_item)
+    # Regular users only see their own orders
+    if current_user.role != "admin":
+        query = query.where(model.customer_id == current_user.id)
     
-    db.commit()
-    db.refresh(new_order)
+    # Filter by status if provided
+    if order_status:
+        query = query.where(model.status == order_status)
     
-    # Broadcast new order to admins via WebSocket
-    await manager.broadcast_new_order({
-        "type": "new_order",
-        "order": {
-            "id": new_order.id,
-            "order_number": new_order.order_number,
-            "customer_id": new_order.customer_id,
-            "table_number": new_order.table_number,
-            "total_amount": new_order.total_amount,
-            "status": new_order.status.value,
-            "created_at": new_order.created_at.isoformat()
-        }
-    })
+    # Continue strictly after the last row of the previous page
+    if position:
+        query = query.where(tuple_(model.created_at, model.id) < position)
     
-    return new_order
+    return query.options(
+        order_lines_loader(model, item_model)
+    ).order_by(model.created_at.desc(), model.id.desc())
 
 
 @router.get("", response_model=List[OrderResponse])
 async def get_orders(
+    response: Response,
     status: Optional[OrderStatus] = None,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
-    """Get orders. Customers see their own orders, admins see all."""
-    query = db.query(Order)
+    """
+    Get orders, newest first. Customers see their own orders, admins see all.
     
-    # Regular users only see their own orders
-    if current_user.role != "admin":
-        query = query.filter(Order.customer_id == current_user.id)
+    Pages are keyset-paginated on (created_at, id): pass the value of the
+    `X-Next-Cursor` response header as `cursor` to fetch the next page.
+    `skip` is still honoured for old clients but cannot be combined with `cursor`.
+    """
+    if cursor and skip:
+        raise HTTPException(
+            status_code=400,
+            detail="Use either cursor or skip, not both"
+        )
     
-    # Filter by status if provided
-    if status:
-        query = query.filter(Order.status == status)
+    position = decode_order_cursor(cursor) if cursor else None
+    
+    # History spans the hot table and the archive; page through both in
+    # (created_at, id) order and merge, so archiving is invisible to clients
+    window = skip + limit + 1
+    orders = []
+    for model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        query = order_history_query(model, item_model, current_user, status, position)
+        orders.extend(await db.scalars(query.limit(window)))
+    orders.sort(key=lambda order: (order.created_at, order.id), reverse=True)
+    orders = orders[skip:window]
+    
+    if len(orders) > limit:
+        orders = orders[:limit]
+        response.headers["X-Next-Cursor"] = encode_order_cursor(orders[-1])
     
-    orders = query.options(joinedload(Order.order_items).joinedload(OrderItem.menu_item)).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
     return orders
 
 
-
-
 @router.get("/my-orders")
 async def get_my_orders(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
     """Get all orders for the current logged-in user."""
     logger.info(f"📋 Fetching orders for user: {current_user.email}")
     
     try:
-        orders = db.query(Order).filter(
-            Order.customer_id == current_user.id
-        ).order_by(Order.created_at.desc()).all()
+        orders = []
+        for model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+            orders.extend((await db.scalars(select(model).options(
+                joinedload(model.order_items).joinedload(item_model.menu_item)
+            ).where(
+                model.customer_id == current_user.id
+            ))).unique())
+        orders.sort(key=lambda order: (order.created_at, order.id), reverse=True)
         
-        result = []
-        for order in orders:
-            # Get order items
-            order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            items_data = []
-            for item in order_items:
-                menu_item = db.query(MenuItem).filter(MenuItem.id == item.menu_item_id).first()
-                items_data.append({
-                    "menu_item_id": item.menu_item_id,
-                    "name": menu_item.name if menu_item else "Unknown Item",
-                    "quantity": item.quantity,
-                    "price": float(item.price)
-                })
-            
-            result.append({
+        result = [
+            {
                 "id": order.id,
                 "order_number": order.order_number,
                 "table_number": order.table_number,
                 "status": order.status,
                 "total_amount": float(order.total_amount),
-                "items": items_data,
+                "items": serialize_order_items(order),
                 "created_at": order.created_at.isoformat()
-            })
+            }
+            for order in orders
+        ]
         
         logger.info(f"✅ Found {len(result)} orders for user")
         return result
-        
+    
     except Exception as e:
         logger.error(f"❌ Failed to fetch user orders: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch orders: {str(e)}"
         )
+
+
+@router.post("/archive")
+async def run_order_archiving(
+    older_than_days: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
+):
+    """Archive finished orders now instead of waiting for the background job (Admin only)."""
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    moved = await archive_orders(db, days, settings.ARCHIVE_BATCH_SIZE)
+    return {"archived": moved, "older_than_days": days}
+
+
+@router.get("/kitchen")
+async def get_kitchen_board(current_user: UserSnapshot = Depends(get_admin_user)):
+    """
+    Active orders grouped by status column, oldest first (Admin only).
+    
+    Served from the in-memory kitchen queue; no database query.
+    """
+    return kitchen_queue.board()
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
-    """Get a specific order by ID."""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    """Get a specific order by ID, including archived orders."""
+    order = await db.scalar(
+        select(Order).options(order_lines_loader(Order, OrderItem)).where(Order.id == order_id)
+    )
+    if not order:
+        order = await db.scalar(
+            select(ArchivedOrder).options(
+                order_lines_loader(ArchivedOrder, ArchivedOrderItem)
+            ).where(ArchivedOrder.id == order_id)
+        )
     
     if not order:
         raise HTTPException(
@@ -208,11 +367,13 @@ async def get_order(
 async def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Update order status (Admin only)."""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.scalar(
+        select(Order).options(order_lines_loader(Order, OrderItem)).where(Order.id == order_id)
+    )
     
     if not order:
         raise HTTPException(
@@ -221,8 +382,11 @@ async def update_order_status(
         )
     
     order.status = status_update.status
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    await db.refresh(order, ["updated_at"])
+    tracking_cache.invalidate(order.order_number)
+    if not kitchen_queue.set_status(order.id, order.status):
+        kitchen_queue.add(kitchen_entry(order))
     
     # Broadcast status update via WebSocket
     await manager.broadcast_order_update(order.id, {
@@ -238,14 +402,90 @@ async def update_order_status(
     return order
 
 
+def bulk_status_statement(new_statuses: dict, updated_at: datetime):
+    """One UPDATE giving each order in `new_statuses` its own status, via CASE on the id."""
+    return (
+        update(Order)
+        .where(Order.id.in_(new_statuses))
+        .values(
+            status=case(
+                {
+                    # Cast each branch: PostgreSQL reads untyped CASE results as text,
+                    # which it will not assign to the orderstatus enum
+                    order_id: cast(literal(new_status, Order.status.type), Order.status.type)
+                    for order_id, new_status in new_statuses.items()
+                },
+                value=Order.id
+            ),
+            updated_at=updated_at
+        )
+        .returning(Order.id, Order.order_number, Order.status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@router.patch("/status", response_model=List[OrderStatusChange])
+async def bulk_update_order_status(
+    bulk_update: OrderStatusBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
+):
+    """
+    Apply many status transitions in one UPDATE (Admin only).
+    
+    All transitions succeed or none do. Admins get one coalesced
+    `orders_status_updated` notification; order subscribers get the usual
+    per-order `order_status_updated` one.
+    """
+    # Last transition wins if an order is listed twice
+    new_statuses = {change.order_id: change.status for change in bulk_update.updates}
+    updated_at = datetime.now(timezone.utc)
+    
+    result = await db.execute(bulk_status_statement(new_statuses, updated_at))
+    changed = result.all()
+    
+    missing = set(new_statuses) - {row.id for row in changed}
+    if missing:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Orders not found: {sorted(missing)}"
+        )
+    await db.commit()
+    tracking_cache.invalidate(*(row.order_number for row in changed))
+    
+    # Orders moved back onto the board need their lines loaded once
+    for row in changed:
+        kitchen_queue.set_status(row.id, row.status)
+    returning = kitchen_queue.missing((row.id, row.status) for row in changed)
+    if returning:
+        for order in (await db.scalars(select(Order).options(
+            joinedload(Order.order_items).joinedload(OrderItem.menu_item)
+        ).where(Order.id.in_(returning)))).unique():
+            kitchen_queue.add(kitchen_entry(order))
+    
+    changes = [
+        {
+            "id": row.id,
+            "order_number": row.order_number,
+            "status": row.status.value,
+            "updated_at": updated_at.isoformat()
+        }
+        for row in changed
+    ]
+    await manager.broadcast_order_updates(changes)
+    
+    return changes
+
+
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_active_user)
 ):
     """Cancel an order (only if pending)."""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.scalar(select(Order).where(Order.id == order_id))
     
     if not order:
         raise HTTPException(
@@ -268,48 +508,83 @@ async def cancel_order(
         )
     
     order.status = OrderStatus.CANCELLED
-    db.commit()
+    await db.commit()
+    tracking_cache.invalidate(order.order_number)
+    kitchen_queue.set_status(order.id, OrderStatus.CANCELLED)
+    
+    # Broadcast cancellation via WebSocket and order event streams
+    await manager.broadcast_order_update(order.id, {
+        "type": "order_status_updated",
+        "order": {
+            "id": order.id,
+            "order_number": order.order_number,
+            "status": OrderStatus.CANCELLED.value,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+    })
     return None
 
 
-@router.get("/track/{order_number}")
-async def track_order(order_number: str, db: Session = Depends(get_db)):
-    """Track order status by order number (no auth required for guests)."""
+async def load_tracking_payload(order_number: str, db: AsyncSession) -> dict:
+    """Return the tracking payload for an order, through the tracking cache."""
+    payload, generation = tracking_cache.get(order_number)
+    if payload is not None:
+        return payload
+    
     logger.info(f"📍 Tracking order: {order_number}")
     
+    order = (await db.scalars(select(Order).options(
+        joinedload(Order.order_items).joinedload(OrderItem.menu_item)
+    ).where(Order.order_number == order_number))).unique().first()
+    if not order:
+        order = (await db.scalars(select(ArchivedOrder).options(
+            joinedload(ArchivedOrder.order_items).joinedload(ArchivedOrderItem.menu_item)
+        ).where(ArchivedOrder.order_number == order_number))).unique().first()
+    
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    payload = {
+        "id": order.id,
+        "order_number": order.order_number,
+        "table_number": order.table_number,
+        "guest_name": order.guest_name,
+        "status": order.status.value,
+        "total_amount": float(order.total_amount),
+        "items": serialize_order_items(order),
+        "created_at": order.created_at.isoformat()
+    }
+    tracking_cache.put(order_number, payload, generation, read_lag_bound(db))
+    return payload
+
+
+async def load_tracking_payload_or_primary(order_number: str, db: AsyncSession, primary_db: AsyncSession) -> dict:
+    """
+    `load_tracking_payload` on a read session. A replica may not have a
+    just-placed order yet, so a miss there is retried on the primary
+    before it becomes a 404.
+    """
     try:
-        order = db.query(Order).filter(Order.order_number == order_number).first()
-        
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Order not found"
-            )
-        
-        # Get order items
-        order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        
-        items_data = []
-        for item in order_items:
-            menu_item = db.query(MenuItem).filter(MenuItem.id == item.menu_item_id).first()
-            items_data.append({
-                "menu_item_id": item.menu_item_id,
-                "name": menu_item.name if menu_item else "Unknown Item",
-                "quantity": item.quantity,
-                "price": float(item.price)
-            })
-        
-        return {
-            "id": order.id,
-            "order_number": order.order_number,
-            "table_number": order.table_number,
-            "guest_name": order.guest_name,
-            "status": order.status,
-            "total_amount": float(order.total_amount),
-            "items": items_data,
-            "created_at": order.created_at.isoformat()
-        }
-        
+        return await load_tracking_payload(order_number, db)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_404_NOT_FOUND or not is_replica_session(db):
+            raise
+    return await load_tracking_payload(order_number, primary_db)
+
+
+@router.get("/track/{order_number}")
+async def track_order(
+    order_number: str,
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_async_db)
+):
+    """Track order status by order number (no auth required for guests)."""
+    try:
+        return await load_tracking_payload_or_primary(order_number, db, primary_db)
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -317,71 +592,211 @@ async def track_order(order_number: str, db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to track order: {str(e)}"
-
+        
         )
 
 
+def format_sse(data: dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
 
-@router.post("/guest")
-async def create_guest_order(
-    order_data: dict,
-    db: Session = Depends(get_db)
+
+async def order_event_stream(
+    order_id: int,
+    snapshot: Optional[dict],
+    last_event_id: Optional[int],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat_seconds: float,
+    snapshot_event_id: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for one order until it is finished or the client leaves.
+    
+    A fresh stream starts with a `snapshot` of the current tracking payload; a
+    resumed one replays the logged events after `last_event_id` instead.
+    The event log is per worker and bounded, so an unknown id, or one whose
+    later events were evicted from the log, gets a fresh snapshot.
+    
+    `snapshot_event_id` is `manager.last_event_id` from just before the
+    snapshot was loaded; events logged after it are replayed behind the
+    snapshot, since they may predate this stream's listener.
+    """
+    queue = manager.listen_to_order(order_id)
+    # An id this worker never issued (e.g. from another worker) can't be resumed
+    if last_event_id is not None and last_event_id > manager.last_event_id:
+        last_event_id = None
+    missed = manager.events_since(order_id, last_event_id) if last_event_id is not None else None
+    # Nothing to replay for a finished order: the snapshot tells how it ended
+    if not missed and snapshot is not None and snapshot["status"] in FINISHED_STATUSES:
+        missed = None
+    try:
+        if missed is None:
+            last_event_id = snapshot_event_id
+            yield format_sse(snapshot, event="snapshot")
+            if snapshot["status"] in FINISHED_STATUSES:
+                return
+            if snapshot_event_id is not None:
+                missed = manager.events_since(order_id, snapshot_event_id) or []
+        for event_id, message in missed or ():
+            yield format_sse(message, event=message.get("type"), event_id=event_id)
+            last_event_id = event_id
+        if missed and missed[-1][1].get("order", {}).get("status") in FINISHED_STATUSES:
+            return
+        
+        while not await is_disconnected():
+            try:
+                event_id, message = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if last_event_id is not None and event_id <= last_event_id:
+                continue  # already replayed from the log
+            yield format_sse(message, event=message.get("type"), event_id=event_id)
+            if message.get("order", {}).get("status") in FINISHED_STATUSES:
+                return
+    finally:
+        manager.stop_listening(order_id, queue)
+
+
+@router.get("/track/{order_number}/events")
+async def stream_order_events(
+    order_number: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_async_db)
 ):
-    """Create order for guest (no authentication required)."""
-    logger.info("=" * 50)
-    logger.info("🛒 NEW GUEST ORDER!")
-    logger.info(f"Table: {order_data.get('table_number')}")
-    logger.info(f"Guest: {order_data.get('guest_name')}")
-    logger.info(f"Items: {len(order_data.get('items', []))}")
-    logger.info("=" * 50)
+    """
+    Stream status changes for an order as Server-Sent Events (no auth required).
+    
+    Carries the same events the WebSocket order subscribers receive, sends a
+    heartbeat comment when idle, and resumes after `Last-Event-ID` on reconnect.
+    The stream ends once the order is delivered or cancelled.
+    """
+    # Events after this id may be missed by the snapshot; the stream replays them
+    snapshot_event_id = manager.last_event_id
+    snapshot = await load_tracking_payload_or_primary(order_number, db, primary_db)
+    # Release the pooled connections; the stream itself never touches the DB
+    await db.close()
+    await primary_db.close()
     
     try:
-        # Generate order number
-        order_number = generate_order_number()
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_from = None
+    
+    return StreamingResponse(
+        order_event_stream(
+            snapshot["id"],
+            snapshot,
+            resume_from,
+            request.is_disconnected,
+            settings.SSE_HEARTBEAT_SECONDS,
+            snapshot_event_id
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/track-cache/stats")
+async def get_tracking_cache_stats(current_user: UserSnapshot = Depends(get_admin_user)):
+    """Tracking cache hit/miss counters for this worker (Admin only)."""
+    return tracking_cache.stats()
+
+
+
+@router.post("/guest", response_model=GuestOrderResponse)
+async def create_guest_order(
+    order_data: GuestOrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Create order for guest (no authentication required).
+    
+    Retries carrying the same `Idempotency-Key` header replay the first response.
+    """
+    # Guests share no identity; scope keys by table so guests elsewhere can't
+    # collide, and the fingerprint rejects a reused key with another order
+    scope = f"orders:guest:{order_data.table_number or '-'}"
+    async with idempotent_request(idempotency_key, scope, db, request_fingerprint(order_data)) as claim:
+        if claim.replay:
+            return claim.replay
         
-        # Create order
-        db_order = Order(
-            order_number=order_number,
-            customer_id=None,  # No customer for guest orders
-            table_number=order_data.get('table_number'),
-            guest_name=order_data.get('guest_name'),
-            total_amount=order_data.get('total_amount'),
-            status=OrderStatus.PENDING,
-            order_type=order_data.get('order_type', 'dine_in')
-        )
+        logger.info(f"🛒 Guest order: table {order_data.table_number}, {len(order_data.items)} items")
         
-        db.add(db_order)
-        db.flush()  # Get the order ID
+        # Price every line from the in-process menu table, not the client payload
+        menu_prices = await price_table.get(db)
+        total_amount, order_items_data = price_order_lines(order_data.items, menu_prices)
         
-        # Add order items
-        for item in order_data.get('items', []):
-            order_item = OrderItem(
-                order_id=db_order.id,
-                menu_item_id=item['menu_item_id'],
-                quantity=item['quantity'],
-                price=item['price']
+        try:
+            db_order = Order(
+                order_number=await generate_order_number(db),
+                customer_id=None,  # No customer for guest orders
+                table_number=order_data.table_number,
+                guest_name=order_data.guest_name,
+                total_amount=total_amount,
+                notes=order_data.notes,
+                status=OrderStatus.PENDING,
+                order_type=order_data.order_type
             )
-            db.add(order_item)
-        
-        db.commit()
-        db.refresh(db_order)
-        
-        logger.info(f"✅ Guest order created! Order #: {order_number}")
-        
-        return {
-            "id": db_order.id,
-            "order_number": db_order.order_number,
-            "table_number": db_order.table_number,
-            "guest_name": db_order.guest_name,
-            "total_amount": float(db_order.total_amount),
-            "status": db_order.status.value,
-            "created_at": db_order.created_at.isoformat()
-        }
+            
+            db.add(db_order)
+            await db.flush()  # Get the order ID
+            
+            # Add all order items with a single bulk INSERT
+            for item_data in order_items_data:
+                item_data["order_id"] = db_order.id
+            await db.execute(insert(OrderItem), order_items_data)
+            
+            # Build the response from the flushed instance, saving a refresh
+            result = GuestOrderResponse(**{
+                "id": db_order.id,
+                "order_number": db_order.order_number,
+                "table_number": db_order.table_number,
+                "guest_name": db_order.guest_name,
+                "total_amount": float(db_order.total_amount),
+                "status": db_order.status,
+                "created_at": db_order.created_at
+            }).model_dump(mode="json")
+            kitchen_entry_data = {
+                "id": db_order.id,
+                "order_number": db_order.order_number,
+                "table_number": db_order.table_number,
+                "guest_name": db_order.guest_name,
+                "order_type": db_order.order_type,
+                "notes": db_order.notes,
+                "status": OrderStatus.PENDING,
+                "created_at": db_order.created_at,
+                "items": [
+                    {
+                        "menu_item_id": item_data["menu_item_id"],
+                        "name": menu_prices[item_data["menu_item_id"]].name,
+                        "quantity": item_data["quantity"],
+                        "special_instructions": item_data["special_instructions"]
+                    }
+                    for item_data in order_items_data
+                ]
+            }
+            await db.commit()
+            tracking_cache.invalidate(result["order_number"])
+            kitchen_queue.add(kitchen_entry_data)
+            claim.save(status.HTTP_200_OK, result)
+            
+            logger.info(f"✅ Guest order created! Order #: {result['order_number']}")
+            return result
         
-    except Exception as e:
-        logger.error(f"❌ Failed to create guest order: {str(e)}")
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create order: {str(e)}"
-        )
+        except Exception as e:
+            logger.error(f"❌ Failed to create guest order: {str(e)}")
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to create order: {str(e)}"
+            )
@@ -1,13 +1,15 @@
 # app/routers/reservations.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 from datetime import datetime, date
 import logging
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Reservation, User
 from app.schemas import ReservationCreate
+from app.utils.read_replica import get_read_db
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -19,7 +21,7 @@ router = APIRouter()
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_reservation(
     reservation_data: ReservationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new reservation (no auth required)."""
     logger.info("=" * 50)
@@ -58,8 +60,8 @@ async def create_reservation(
         )
         
         db.add(db_reservation)
-        db.commit()
-        db.refresh(db_reservation)
+        await db.commit()
+        await db.refresh(db_reservation)
         
         logger.info(f"✅ Reservation created successfully! ID: {db_reservation.id}")
         
@@ -86,7 +88,7 @@ async def create_reservation(
         )
     except Exception as e:
         logger.error(f"❌ Failed to create reservation: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create reservation: {str(e)}"
@@ -98,7 +100,7 @@ async def check_availability(
     date: str,
     time: str,
     guests: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Check if reservation is available for given date/time."""
     logger.info(f"🔍 Checking availability for {date} at {time} for {guests} guests")
@@ -107,11 +109,11 @@ async def check_availability(
         reservation_date = datetime.strptime(date, "%Y-%m-%d").date()
         
         # Count reservations for this date and time
-        existing_reservations = db.query(Reservation).filter(
+        existing_reservations = await db.scalar(select(func.count()).select_from(Reservation).where(
             Reservation.date == reservation_date,
             Reservation.time == time,
             Reservation.status != "cancelled"
-        ).count()
+        ))
         
         # Simple availability check (max 10 tables)
         max_tables = 10
@@ -132,12 +134,14 @@ async def check_availability(
 
 
 @router.get("/")
-async def get_all_reservations(db: Session = Depends(get_db)):
+async def get_all_reservations(db: AsyncSession = Depends(get_read_db)):
     """Get all reservations (for admin)."""
     logger.info("📋 Fetching all reservations")
     
     try:
-        reservations = db.query(Reservation).order_by(Reservation.date.desc(), Reservation.time.desc()).all()
+        reservations = (await db.scalars(
+            select(Reservation).order_by(Reservation.date.desc(), Reservation.time.desc())
+        )).all()
         
         logger.info(f"✅ Found {len(reservations)} reservations")
         
@@ -171,13 +175,13 @@ async def get_all_reservations(db: Session = Depends(get_db)):
 async def update_reservation_status(
     reservation_id: int,
     status_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update reservation status."""
     logger.info(f"🔄 Updating reservation {reservation_id} status to {status_data.get('status')}")
     
     try:
-        reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+        reservation = await db.get(Reservation, reservation_id)
         
         if not reservation:
             raise HTTPException(
@@ -193,8 +197,8 @@ async def update_reservation_status(
             )
         
         reservation.status = new_status
-        db.commit()
-        db.refresh(reservation)
+        await db.commit()
+        await db.refresh(reservation)
         
         logger.info(f"✅ Reservation {reservation_id} status updated to {new_status}")
         
@@ -208,7 +212,7 @@ async def update_reservation_status(
         raise
     except Exception as e:
         logger.error(f"❌ Failed to update reservation: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update reservation: {str(e)}"
@@ -1,20 +1,22 @@
 # app/routers/restaurant.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict
 
-from app.database import get_db
-from app.models import Restaurant, User, Order, MenuItem, OrderStatus
+from app.database import async_engine, get_async_db, pool_stats
+from app.models import Restaurant, Order, MenuItem, OrderStatus, ArchivedOrder
 from app.schemas import RestaurantUpdate, RestaurantResponse
 from app.utils.auth import get_admin_user
+from app.utils.user_cache import UserSnapshot
 
 router = APIRouter()
 
 
 @router.get("/info", response_model=RestaurantResponse)
-async def get_restaurant_info(db: Session = Depends(get_db)):
+async def get_restaurant_info(db: AsyncSession = Depends(get_async_db)):
     """Get restaurant information."""
-    restaurant = db.query(Restaurant).first()
+    restaurant = await db.scalar(select(Restaurant))
     
     if not restaurant:
         # Create default restaurant info if doesn't exist
@@ -24,8 +26,8 @@ async def get_restaurant_info(db: Session = Depends(get_db)):
             is_open=True
         )
         db.add(restaurant)
-        db.commit()
-        db.refresh(restaurant)
+        await db.commit()
+        await db.refresh(restaurant)
     
     return restaurant
 
@@ -33,11 +35,11 @@ async def get_restaurant_info(db: Session = Depends(get_db)):
 @router.put("/info", response_model=RestaurantResponse)
 async def update_restaurant_info(
     update_data: RestaurantUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
     """Update restaurant information (Admin only)."""
-    restaurant = db.query(Restaurant).first()
+    restaurant = await db.scalar(select(Restaurant))
     
     if not restaurant:
         raise HTTPException(
@@ -50,29 +52,38 @@ async def update_restaurant_info(
     for key, value in update_values.items():
         setattr(restaurant, key, value)
     
-    db.commit()
-    db.refresh(restaurant)
+    await db.commit()
+    await db.refresh(restaurant)
     return restaurant
 
 
 @router.get("/stats", response_model=Dict)
 async def get_restaurant_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_admin_user)
 ):
-    """Get restaurant statistics (Admin only)."""
-    total_orders = db.query(Order).count()
-    pending_orders = db.query(Order).filter(Order.status == OrderStatus.PENDING).count()
-    completed_orders = db.query(Order).filter(Order.status == OrderStatus.DELIVERED).count()
-    total_menu_items = db.query(MenuItem).count()
-    available_items = db.query(MenuItem).filter(MenuItem.is_available == True).count()
+    """Get restaurant statistics (Admin only). Order figures include archived orders."""
+    models = (Order, ArchivedOrder)
+    total_orders = sum([await db.scalar(select(func.count()).select_from(model)) for model in models])
+    pending_orders = await db.scalar(
+        select(func.count()).select_from(Order).where(Order.status == OrderStatus.PENDING)
+    )
+    completed_orders = sum([
+        await db.scalar(select(func.count()).select_from(model).where(model.status == OrderStatus.DELIVERED))
+        for model in models
+    ])
+    total_menu_items = await db.scalar(select(func.count()).select_from(MenuItem))
+    available_items = await db.scalar(
+        select(func.count()).select_from(MenuItem).where(MenuItem.is_available == True)
+    )
     
     # Calculate total revenue from completed orders
-    total_revenue = db.query(Order).filter(
-        Order.status == OrderStatus.DELIVERED
-    ).with_entities(
-        db.func.sum(Order.total_amount)
-    ).scalar() or 0.0
+    total_revenue = sum([
+        await db.scalar(
+            select(func.sum(model.total_amount)).where(model.status == OrderStatus.DELIVERED)
+        ) or 0.0
+        for model in models
+    ])
     
     return {
         "total_orders": total_orders,
@@ -82,3 +93,14 @@ async def get_restaurant_stats(
         "available_items": available_items,
         "total_revenue": float(total_revenue)
     }
+
+
+@router.get("/db-pool", response_model=Dict)
+async def get_db_pool_stats(current_user: UserSnapshot = Depends(get_admin_user)):
+    """
+    Connection pool occupancy and checkout timings for this worker (Admin only).
+    
+    Multiply pool_size + max_overflow by the worker count to compare against
+    Postgres max_connections.
+    """
+    return pool_stats(async_engine)
@@ -1,19 +1,20 @@
 # app/routers/websocket.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 import logging
 
 from app.websocket import manager
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-async def get_user_from_token(token: str, db: Session) -> User:
+async def get_user_from_token(token: str, db: AsyncSession) -> User:
     """Verify WebSocket token and get user."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -21,7 +22,10 @@ async def get_user_from_token(token: str, db: Session) -> User:
         if email is None:
             return None
         
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
+        # Tokens issued before a revocation carry an older version
+        if user is not None and payload.get("ver", user.token_version) != user.token_version:
+            return None
         return user
     except JWTError:
         return None
@@ -31,7 +35,7 @@ async def get_user_from_token(token: str, db: Session) -> User:
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     WebSocket endpoint for real-time updates.
@@ -40,6 +44,8 @@ async def websocket_endpoint(
     """
     # Verify token and get user
     user = await get_user_from_token(token, db)
+    # Release the pooled connection; the socket may stay open for hours
+    await db.close()
     
     if not user:
         await websocket.close(code=1008, reason="Invalid authentication token")
@@ -1,7 +1,7 @@
 from datetime import datetime, date
 # app/schemas.py
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Optional, List, Union
 from app.models import UserRole, OrderStatus
 
 # ============ AUTH SCHEMAS ============
@@ -29,8 +29,12 @@ class UserResponse(UserBase):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -42,6 +46,11 @@ class UserUpdate(BaseModel):
     class Config:
         from_attributes = True
 
+# Admin change of a user's role or active flag; revokes the user's tokens
+class UserAccessUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 # ============ MENU SCHEMAS ============
 class CategoryBase(BaseModel):
     name: str
@@ -83,6 +92,16 @@ class MenuItemUpdate(BaseModel):
     is_vegetarian: Optional[bool] = None
     is_spicy: Optional[bool] = None
 
+# Bulk "86 list" change: one availability flag for many items
+class MenuAvailabilityUpdate(BaseModel):
+    item_ids: List[int] = Field(..., min_length=1, max_length=500)
+    is_available: bool
+
+class MenuAvailabilityChange(BaseModel):
+    item_ids: List[int]
+    is_available: bool
+    updated_at: datetime
+
 class MenuItemResponse(MenuItemBase):
     id: int
     is_available: bool
@@ -93,6 +112,88 @@ class MenuItemResponse(MenuItemBase):
     class Config:
         from_attributes = True
 
+# Full-menu snapshot: items are nested under their category instead of embedding it
+class MenuSnapshotItem(MenuItemBase):
+    id: int
+    is_available: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class MenuSnapshotCategory(CategoryResponse):
+    items: List[MenuSnapshotItem] = Field(validation_alias="menu_items")
+
+# Category list with item counts and price range for menu badges
+class CategorySummary(CategoryResponse):
+    total_items: int
+    available_items: int
+    vegetarian_items: int
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+# Menu search (served from the in-memory index)
+class MenuSearchHit(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    price: float
+    category_id: Optional[int] = None
+    is_available: bool
+    is_vegetarian: bool
+    is_spicy: bool
+    calories: Optional[int] = None
+    preparation_time: Optional[int] = None
+    score: int
+
+class FacetRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class MenuSearchFacets(BaseModel):
+    total: int
+    vegetarian: int
+    spicy: int
+    available: int
+    price: FacetRange
+    calories: FacetRange
+    preparation_time: FacetRange
+
+class MenuSearchResponse(BaseModel):
+    items: List[MenuSearchHit]
+    facets: MenuSearchFacets
+
+# Bulk menu import/export rows; categories are matched by name, items by (category, name)
+class CategoryImportRow(BaseModel):
+    name: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    is_active: bool = True
+
+class MenuItemImportRow(BaseModel):
+    name: str = Field(..., min_length=1)
+    category: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    price: float = Field(..., gt=0)
+    image_url: Optional[str] = None
+    is_available: bool = True
+    is_vegetarian: bool = False
+    is_spicy: bool = False
+    preparation_time: Optional[int] = Field(None, ge=0)
+    calories: Optional[int] = Field(None, ge=0)
+
+class MenuImportError(BaseModel):
+    line: int
+    error: str
+
+class MenuImportReport(BaseModel):
+    rows: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[MenuImportError]
+
 # ============ ORDER SCHEMAS ============
 class OrderItemCreate(BaseModel):
     menu_item_id: int
@@ -114,9 +215,45 @@ class OrderCreate(BaseModel):
     notes: Optional[str] = None
     items: List[OrderItemCreate]
 
+class GuestOrderCreate(BaseModel):
+    table_number: Optional[str] = None
+    guest_name: Optional[str] = None
+    order_type: str = "dine_in"
+    notes: Optional[str] = None
+    items: List[OrderItemCreate] = Field(..., min_length=1)
+    # Client-sent prices and totals are ignored; the server prices every line
+
+    @field_validator("table_number", mode="before")
+    @classmethod
+    def table_number_as_str(cls, value: Union[str, int, None]) -> Optional[str]:
+        """The QR flow sends the table number as an integer."""
+        return str(value) if value is not None else None
+
+class GuestOrderResponse(BaseModel):
+    id: int
+    order_number: str
+    table_number: Optional[str] = None
+    guest_name: Optional[str] = None
+    total_amount: float
+    status: OrderStatus
+    created_at: datetime
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
+class OrderStatusTransition(BaseModel):
+    order_id: int
+    status: OrderStatus
+
+class OrderStatusBulkUpdate(BaseModel):
+    updates: List[OrderStatusTransition] = Field(..., min_length=1, max_length=200)
+
+class OrderStatusChange(BaseModel):
+    id: int
+    order_number: str
+    status: OrderStatus
+    updated_at: datetime
+
 class OrderResponse(BaseModel):
     id: int
     order_number: str
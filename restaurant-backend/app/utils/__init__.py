@@ -2,7 +2,7 @@
 """
 Utility functions package.
 """
-from . import auth
+from . import archive, auth, idempotency, kitchen_queue, menu_cache, menu_search, menu_transfer, order_cache, order_number, password_hashing, rate_limit, read_replica, refresh_tokens, user_cache
 
-__all__ = ["auth"]
+__all__ = ["archive", "auth", "idempotency", "kitchen_queue", "menu_cache", "menu_search", "menu_transfer", "order_cache", "order_number", "password_hashing", "rate_limit", "read_replica", "refresh_tokens", "user_cache"]
 
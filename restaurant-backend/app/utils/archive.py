@@ -0,0 +1,74 @@
+# app/utils/archive.py
+"""
+Order archiving.
+
+Delivered and cancelled orders older than ARCHIVE_AFTER_DAYS are moved,
+with their lines, from `orders`/`order_items` into `orders_archive`/
+`order_items_archive` in batches. Each batch is one transaction of four
+set-based statements. The hot tables then only hold recent and active
+orders. The order read endpoints fall back to the archive, so history
+stays visible.
+
+Every worker runs the archiver, so runs can overlap. On PostgreSQL the
+batch select locks its rows with FOR UPDATE SKIP LOCKED, so concurrent
+runs take disjoint batches. SQLite has no row locks but serializes
+writers, so a run whose batch another run already moved copies and
+deletes nothing; runs count only the orders they deleted themselves.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+
+ARCHIVABLE_STATUSES = [OrderStatus.DELIVERED, OrderStatus.CANCELLED]
+
+
+def copy_rows(source, target, ids_column, ids):
+    """INSERT INTO target SELECT <shared columns> FROM source WHERE <ids match>."""
+    names = [column.name for column in source.columns if column.name in target.columns]
+    return insert(target).from_select(
+        names,
+        select(*[source.c[name] for name in names]).where(ids_column.in_(ids))
+    )
+
+
+async def archive_orders(
+    db: AsyncSession,
+    older_than_days: int,
+    batch_size: int = 500,
+    max_batches: Optional[int] = None
+) -> int:
+    """Move finished orders older than the cutoff into the archive. Returns the count moved."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    orders = Order.__table__
+    items = OrderItem.__table__
+    moved = 0
+    batches = 0
+    
+    while max_batches is None or batches < max_batches:
+        ids = (await db.scalars(
+            select(Order.id).where(
+                Order.status.in_(ARCHIVABLE_STATUSES),
+                Order.created_at < cutoff
+            ).order_by(Order.created_at).limit(batch_size).with_for_update(skip_locked=True)
+        )).all()
+        if not ids:
+            break
+        
+        try:
+            await db.execute(copy_rows(orders, ArchivedOrder.__table__, orders.c.id, ids))
+            await db.execute(copy_rows(items, ArchivedOrderItem.__table__, items.c.order_id, ids))
+            await db.execute(delete(items).where(items.c.order_id.in_(ids)))
+            deleted = await db.execute(delete(orders).where(orders.c.id.in_(ids)))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        
+        moved += deleted.rowcount
+        batches += 1
+    
+    return moved
@@ -5,12 +5,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
-from app.models import User
+from app.database import get_async_db
+from app.models import User, UserRole
 from app.schemas import TokenData
+from app.utils.user_cache import UserSnapshot, token_versions, user_cache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -42,6 +44,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def token_claims(user: User) -> dict:
+    """Claims identifying `user` in an access token: enough to authorize without a lookup."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": UserRole(user.role).value,
+        "ver": user.token_version
+    }
+
+
+# Version stored for users that no longer exist or are inactive: matches no token
+REVOKED_VERSION = -1
+
+
+async def current_token_version(db: AsyncSession, user_id: int) -> int:
+    """The user's current token version, cached per user id."""
+    version, generation = token_versions.get(user_id)
+    if version is not None:
+        return version
+    
+    row = (await db.execute(
+        select(User.token_version, User.is_active).where(User.id == user_id)
+    )).first()
+    version = row.token_version if row is not None and row.is_active else REVOKED_VERSION
+    token_versions.put(user_id, version, generation)
+    return version
+
+
 def decode_access_token(token: str) -> TokenData:
     """Decode and verify a JWT token."""
     try:
@@ -62,9 +92,15 @@ def decode_access_token(token: str) -> TokenData:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    """
+    Get the current authenticated user from JWT token.
+    
+    With AUTH_TRUST_TOKEN_CLAIMS, tokens carrying id/role/version claims are
+    authorized from the claims, after checking the version against the
+    user's current one. Other tokens resolve through the user cache.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -79,16 +115,38 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
+    version = payload.get("ver")
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and version is not None:
+        try:
+            snapshot = UserSnapshot(
+                id=int(payload["uid"]),
+                email=email,
+                role=UserRole(payload["role"]),
+                is_active=True,
+                token_version=version
+            )
+        except (KeyError, TypeError, ValueError):
+            raise credentials_exception
+        if await current_token_version(db, snapshot.id) != version:
+            raise credentials_exception
+        return snapshot
     
-    return user
+    snapshot, generation = user_cache.get(email)
+    if snapshot is None:
+        user = await db.scalar(select(User).where(User.email == email))
+        if user is None:
+            raise credentials_exception
+        snapshot = UserSnapshot.from_user(user)
+        user_cache.put(email, snapshot, generation)
+    
+    if version is not None and version != snapshot.token_version:
+        raise credentials_exception
+    return snapshot
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user)
+) -> UserSnapshot:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -96,8 +154,8 @@ async def get_current_active_user(
 
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_active_user)
+) -> UserSnapshot:
     """Verify that the current user is an admin."""
     if current_user.role != "admin":
         raise HTTPException(
@@ -105,3 +163,28 @@ async def get_admin_user(
             detail="Not enough permissions"
         )
     return current_user
+
+
+async def get_current_user_record(
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Load the full row of the current active user, for handlers that need more than the snapshot."""
+    user = await db.get(User, current_user.id)
+    if user is None:
+        user_cache.invalidate(current_user.email)
+        token_versions.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def revoke_tokens(user: User):
+    """
+    Invalidate every access token issued to `user` so far. Call before
+    committing a role or is_active change, then `invalidate_user(user)`.
+    """
+    user.token_version = (user.token_version or 0) + 1
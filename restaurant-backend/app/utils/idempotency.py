@@ -0,0 +1,304 @@
+# app/utils/idempotency.py
+"""
+Idempotency-Key support for order submission.
+
+A client that retries a POST with the same `Idempotency-Key` header gets
+the stored response of the first attempt instead of a second order.
+Concurrent duplicates wait for the first attempt to finish. A failed
+attempt (any exception, including HTTP errors) is forgotten so the client
+can retry it. A key reused with a different request body is rejected
+with 422 rather than answered with another request's response.
+
+Two backends are available via IDEMPOTENCY_BACKEND:
+- "memory" (default): bounded per-worker store with TTL eviction.
+- "database": the idempotency_keys table, shared by every worker. A claim
+  only holds a short lease (IDEMPOTENCY_LEASE_SECONDS) until its response
+  is stored, so a key whose worker died mid-request is taken over by the
+  next retry instead of answering 409 for the whole TTL.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import IdempotencyRecord
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(body: BaseModel) -> str:
+    """Digest of a request body, to tell a retry from a different request reusing its key."""
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+def check_fingerprint(stored: Optional[str], fingerprint: Optional[str]):
+    if stored and fingerprint and stored != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="This Idempotency-Key was already used with a different request"
+        )
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: Any
+
+
+@dataclass
+class _MemoryEntry:
+    expires_at: float
+    done: asyncio.Event
+    fingerprint: Optional[str] = None
+    response: Optional[StoredResponse] = None
+
+
+class MemoryIdempotencyStore:
+    """Per-worker store: an insertion-ordered dict bounded by size and TTL."""
+    
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+    
+    def _evict(self):
+        """Drop expired entries, then the oldest completed ones over the cap."""
+        now = time.monotonic()
+        # All entries share one TTL, so the oldest are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            self._entries.popitem(last=False)
+        
+        if len(self._entries) > self.max_entries:
+            for key in list(self._entries):
+                if len(self._entries) <= self.max_entries:
+                    break
+                if self._entries[key].response is not None:
+                    del self._entries[key]
+    
+    async def begin(
+        self,
+        key: str,
+        db: AsyncSession,
+        wait_seconds: float,
+        fingerprint: Optional[str] = None
+    ) -> Optional[StoredResponse]:
+        """Claim `key`, or return the stored response once the owner finishes."""
+        self._evict()
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = _MemoryEntry(
+                    expires_at=time.monotonic() + self.ttl_seconds,
+                    done=asyncio.Event(),
+                    fingerprint=fingerprint
+                )
+                return None
+            check_fingerprint(entry.fingerprint, fingerprint)
+            if entry.response is not None:
+                return entry.response
+            
+            # Another request with this key is in flight: wait for it
+            try:
+                await asyncio.wait_for(entry.done.wait(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+    
+    async def complete(self, key: str, response: StoredResponse, db: AsyncSession):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.response = response
+            entry.done.set()
+    
+    async def abort(self, key: str, db: AsyncSession):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+
+class DatabaseIdempotencyStore:
+    """
+    Shared store on the idempotency_keys table for multi-worker deployments.
+    
+    Claims and results are written in their own short transactions on the
+    request session's engine so other workers see them immediately.
+    """
+    
+    poll_interval = 0.05
+    
+    def __init__(self, ttl_seconds: float, lease_seconds: float, sweep_interval: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+    
+    async def _sweep(self, bind):
+        """Delete expired keys, at most once per sweep interval."""
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = time.monotonic()
+        table = IdempotencyRecord.__table__
+        async with bind.begin() as conn:
+            await conn.execute(delete(table).where(table.c.expires_at < datetime.now(timezone.utc)))
+    
+    async def begin(
+        self,
+        key: str,
+        db: AsyncSession,
+        wait_seconds: float,
+        fingerprint: Optional[str] = None
+    ) -> Optional[StoredResponse]:
+        bind = db.bind
+        table = IdempotencyRecord.__table__
+        await self._sweep(bind)
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            now = datetime.now(timezone.utc)
+            lease_expiry = now + timedelta(seconds=self.lease_seconds)
+            try:
+                async with bind.begin() as conn:
+                    await conn.execute(insert(table).values(
+                        key=key,
+                        request_fingerprint=fingerprint,
+                        expires_at=lease_expiry
+                    ))
+                return None
+            except IntegrityError:
+                pass
+            
+            async with bind.connect() as conn:
+                row = (await conn.execute(
+                    select(table.c.status_code, table.c.response_body, table.c.request_fingerprint)
+                    .where(table.c.key == key)
+                )).first()
+            if row is not None:
+                check_fingerprint(row.request_fingerprint, fingerprint)
+            if row is not None and row.status_code is not None:
+                return StoredResponse(row.status_code, json.loads(row.response_body))
+            
+            if row is not None:
+                # The owner may have died mid-request: take over an expired lease
+                async with bind.begin() as conn:
+                    taken = await conn.execute(update(table).where(
+                        table.c.key == key,
+                        table.c.status_code.is_(None),
+                        table.c.expires_at < now
+                    ).values(expires_at=lease_expiry))
+                if taken.rowcount == 1:
+                    return None
+            
+            # In flight on this or another worker (or just aborted): poll
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(self.poll_interval)
+    
+    async def complete(self, key: str, response: StoredResponse, db: AsyncSession):
+        table = IdempotencyRecord.__table__
+        async with db.bind.begin() as conn:
+            await conn.execute(update(table).where(table.c.key == key).values(
+                status_code=response.status_code,
+                response_body=json.dumps(response.body),
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+            ))
+    
+    async def abort(self, key: str, db: AsyncSession):
+        table = IdempotencyRecord.__table__
+        async with db.bind.begin() as conn:
+            await conn.execute(delete(table).where(table.c.key == key, table.c.status_code.is_(None)))
+
+
+class IdempotencyClaim:
+    """Handle yielded by `idempotent_request`."""
+    
+    def __init__(self, replay: Optional[StoredResponse] = None):
+        self.replay: Optional[JSONResponse] = None
+        if replay is not None:
+            self.replay = JSONResponse(
+                content=replay.body,
+                status_code=replay.status_code,
+                headers={REPLAY_HEADER: "true"}
+            )
+        self.response: Optional[StoredResponse] = None
+    
+    def save(self, status_code: int, body: Any):
+        """Record the JSON-ready response to replay for later duplicates."""
+        self.response = StoredResponse(status_code, body)
+
+
+def build_store():
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore(
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS
+        )
+    return MemoryIdempotencyStore(
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        max_entries=settings.IDEMPOTENCY_MAX_ENTRIES
+    )
+
+
+# Global store shared by all requests in this worker
+idempotency_store = build_store()
+
+
+@asynccontextmanager
+async def idempotent_request(key: Optional[str], scope: str, db: AsyncSession, fingerprint: Optional[str] = None):
+    """
+    Run a request body at most once per (scope, key).
+    
+    `fingerprint` (see `request_fingerprint`) identifies the request; a
+    duplicate with a different fingerprint gets 422.
+    
+    Usage::
+    
+        async with idempotent_request(key, scope, db, request_fingerprint(body)) as claim:
+            if claim.replay:
+                return claim.replay
+            ...
+            claim.save(201, body)
+    
+    Without a key the body simply runs.
+    """
+    if not key:
+        yield IdempotencyClaim()
+        return
+    
+    store_key = f"{scope}:{key}"
+    stored = await idempotency_store.begin(store_key, db, settings.IDEMPOTENCY_WAIT_SECONDS, fingerprint)
+    claim = IdempotencyClaim(stored)
+    if stored is not None:
+        yield claim
+        return
+    
+    try:
+        yield claim
+    except BaseException:
+        await idempotency_store.abort(store_key, db)
+        raise
+    
+    if claim.response is not None:
+        await idempotency_store.complete(store_key, claim.response, db)
+    else:
+        await idempotency_store.abort(store_key, db)
@@ -0,0 +1,126 @@
+# app/utils/kitchen_queue.py
+"""
+In-memory index of active (pending through ready) orders for the kitchen board.
+
+The index is built from the database once at startup and then updated in
+place by the order endpoints. GET /api/orders/kitchen serves the board
+from it without touching the database. The periodic resync picks up
+writes made by other worker processes.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.models import Order, OrderItem, OrderStatus
+
+# Board columns, in kitchen flow order
+ACTIVE_STATUSES = [
+    OrderStatus.PENDING,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PREPARING,
+    OrderStatus.READY,
+]
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive timestamps (SQLite) as UTC so entries sort together."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def kitchen_entry(order: Order) -> dict:
+    """Build a board entry from an order with its lines and menu items."""
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "table_number": order.table_number,
+        "guest_name": order.guest_name,
+        "order_type": order.order_type,
+        "notes": order.notes,
+        "status": OrderStatus(order.status),
+        "created_at": order.created_at,
+        "items": [
+            {
+                "menu_item_id": item.menu_item_id,
+                "name": item.menu_item.name if item.menu_item else "Unknown Item",
+                "quantity": item.quantity,
+                "special_instructions": item.special_instructions
+            }
+            for item in order.order_items
+        ]
+    }
+
+
+class KitchenQueue:
+    """Active orders keyed by id."""
+    
+    def __init__(self):
+        self._orders: Dict[int, dict] = {}
+        self.loaded_at: Optional[datetime] = None
+    
+    async def load(self, db: AsyncSession):
+        """Rebuild the index from the database in one query."""
+        orders = (await db.scalars(select(Order).options(
+            joinedload(Order.order_items).joinedload(OrderItem.menu_item)
+        ).where(Order.status.in_(ACTIVE_STATUSES)))).unique().all()
+        self._orders = {}
+        for order in orders:
+            self.add(kitchen_entry(order))
+        self.loaded_at = datetime.now(timezone.utc)
+    
+    def clear(self):
+        self._orders = {}
+        self.loaded_at = None
+    
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+    
+    def add(self, entry: dict):
+        """Insert or replace an order; inactive orders are dropped."""
+        if entry["status"] in ACTIVE_STATUSES:
+            entry["created_at"] = as_utc(entry["created_at"])
+            self._orders[entry["id"]] = entry
+        else:
+            self._orders.pop(entry["id"], None)
+    
+    def set_status(self, order_id: int, new_status: OrderStatus) -> bool:
+        """
+        Move a known order to a new status, dropping it once it leaves the
+        board. Returns False if the order is not in the index.
+        """
+        entry = self._orders.get(order_id)
+        if entry is None:
+            return False
+        if new_status in ACTIVE_STATUSES:
+            entry["status"] = OrderStatus(new_status)
+        else:
+            del self._orders[order_id]
+        return True
+    
+    def missing(self, changes: Iterable[tuple]) -> List[int]:
+        """Ids of (order_id, status) changes that enter the board but aren't indexed."""
+        return [
+            order_id for order_id, new_status in changes
+            if new_status in ACTIVE_STATUSES and order_id not in self._orders
+        ]
+    
+    def board(self) -> dict:
+        """Board columns in flow order, each oldest first."""
+        columns = {order_status.value: [] for order_status in ACTIVE_STATUSES}
+        for entry in sorted(self._orders.values(), key=lambda entry: (entry["created_at"], entry["id"])):
+            columns[entry["status"].value].append({
+                **entry,
+                "status": entry["status"].value,
+                "created_at": entry["created_at"].isoformat()
+            })
+        return {
+            "columns": columns,
+            "counts": {name: len(entries) for name, entries in columns.items()},
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None
+        }
+
+
+# Global index shared by all requests in this worker
+kitchen_queue = KitchenQueue()
@@ -0,0 +1,179 @@
+# app/utils/menu_cache.py
+"""
+In-process menu caches.
+
+The menu changes rarely but is read on every order and every table QR
+scan, so each worker keeps its own copy: a price table for order
+submission and a pre-serialized snapshot for the menu pages. Every write
+in app/routers/menu.py calls `invalidate_menu_caches()`; a short TTL
+bounds staleness for writes made by other worker processes.
+"""
+import hashlib
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models import Category, MenuItem
+from app.schemas import CategoryResponse, CategorySummary, MenuSnapshotCategory
+
+
+class MenuPrice(NamedTuple):
+    """Price and availability of one menu item."""
+    id: int
+    name: str
+    price: float
+    is_available: bool
+
+
+class MenuPriceTable:
+    """Price/availability table for every menu item, loaded in one query."""
+    
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._prices: Optional[Dict[int, MenuPrice]] = None
+        self._loaded_at = 0.0
+        self._version = 0
+    
+    async def get(self, db: AsyncSession) -> Dict[int, MenuPrice]:
+        """Return the table, reloading it if it was invalidated or expired."""
+        with self._lock:
+            prices = self._prices
+            fresh = prices is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+            version = self._version
+        if fresh:
+            return prices
+        
+        rows = (await db.execute(select(
+            MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.is_available
+        ))).all()
+        prices = {row.id: MenuPrice(row.id, row.name, row.price, bool(row.is_available)) for row in rows}
+        
+        with self._lock:
+            # Don't install a table that a concurrent write already invalidated
+            if self._version == version:
+                self._prices = prices
+                self._loaded_at = time.monotonic()
+        return prices
+    
+    def invalidate(self):
+        """Drop the table so the next read reloads it."""
+        with self._lock:
+            self._prices = None
+            self._version += 1
+
+
+class SerializedBody(NamedTuple):
+    """A JSON response body and its strong ETag."""
+    content: bytes
+    etag: str
+    
+    @classmethod
+    def of(cls, content: bytes) -> "SerializedBody":
+        # Derived from the content alone, so every worker agrees on it
+        return cls(content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+
+
+class MenuSnapshotData(NamedTuple):
+    menu: SerializedBody  # active categories with their items
+    categories: SerializedBody  # active categories only
+    summaries: SerializedBody  # active categories with item counts and price range
+
+
+menu_adapter = TypeAdapter(List[MenuSnapshotCategory])
+categories_adapter = TypeAdapter(List[CategoryResponse])
+summaries_adapter = TypeAdapter(List[CategorySummary])
+
+
+async def load_category_summaries(db: AsyncSession) -> List[CategorySummary]:
+    """Item counts and price range of every active category, in one GROUP BY."""
+    rows = (await db.execute(
+        select(
+            Category,
+            func.count(MenuItem.id).label("total_items"),
+            func.count(case((MenuItem.is_available == True, MenuItem.id))).label("available_items"),
+            func.count(case((MenuItem.is_vegetarian == True, MenuItem.id))).label("vegetarian_items"),
+            func.min(MenuItem.price).label("min_price"),
+            func.max(MenuItem.price).label("max_price")
+        )
+        .outerjoin(MenuItem, MenuItem.category_id == Category.id)
+        .where(Category.is_active == True)
+        .group_by(Category.id)
+        .order_by(Category.id)
+    )).all()
+    return [
+        CategorySummary(
+            **CategoryResponse.model_validate(row.Category).model_dump(),
+            total_items=row.total_items,
+            available_items=row.available_items,
+            vegetarian_items=row.vegetarian_items,
+            min_price=row.min_price,
+            max_price=row.max_price
+        )
+        for row in rows
+    ]
+
+
+class MenuSnapshot:
+    """Pre-serialized full menu, rebuilt on the first read after a write."""
+    
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._data: Optional[MenuSnapshotData] = None
+        self._loaded_at = 0.0
+        self._version = 0
+    
+    async def get(self, db: AsyncSession) -> MenuSnapshotData:
+        """Return the snapshot, rebuilding it if it was invalidated or expired."""
+        with self._lock:
+            data = self._data
+            fresh = data is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+            version = self._version
+        if fresh:
+            return data
+        
+        categories = (await db.scalars(
+            select(Category)
+            .options(selectinload(Category.menu_items))
+            .where(Category.is_active == True)
+            .order_by(Category.id)
+        )).all()
+        menu = [MenuSnapshotCategory.model_validate(category) for category in categories]
+        for category in menu:
+            category.items.sort(key=lambda item: item.id)
+        data = MenuSnapshotData(
+            menu=SerializedBody.of(menu_adapter.dump_json(menu)),
+            categories=SerializedBody.of(categories_adapter.dump_json(categories)),
+            summaries=SerializedBody.of(summaries_adapter.dump_json(await load_category_summaries(db)))
+        )
+        
+        with self._lock:
+            # Don't install a snapshot that a concurrent write already invalidated
+            if self._version == version:
+                self._data = data
+                self._loaded_at = time.monotonic()
+        return data
+    
+    def invalidate(self):
+        """Drop the snapshot so the next read rebuilds it."""
+        with self._lock:
+            self._data = None
+            self._version += 1
+
+
+# Global caches shared by all requests in this worker
+price_table = MenuPriceTable(ttl_seconds=settings.MENU_CACHE_TTL_SECONDS)
+menu_snapshot = MenuSnapshot(ttl_seconds=settings.MENU_CACHE_TTL_SECONDS)
+
+
+def invalidate_menu_caches():
+    """Invalidate every menu cache after a write to menu items or categories."""
+    price_table.invalidate()
+    menu_snapshot.invalidate()
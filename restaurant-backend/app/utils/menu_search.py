@@ -0,0 +1,338 @@
+# app/utils/menu_search.py
+"""
+In-process full-text search over the menu.
+
+`menu_search` is an inverted index over menu item names and descriptions,
+with the facet fields kept next to it, so a search never touches the
+database. It is built from the database at startup (and every
+MENU_SEARCH_RESYNC_SECONDS, to pick up other workers' writes); the menu
+router keeps it current by calling `upsert` / `remove` after each write.
+
+Each query word matches index terms that are:
+- equal to it,
+- prefixed by it (so "marg" finds "margherita"), or
+- one typo away (insertion, deletion, substitution or adjacent
+  transposition) for words of FUZZY_MIN_LENGTH letters or more.
+Every query word has to match (AND); hits are ranked by how well they
+matched, with name matches above description matches.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import MenuItem
+
+FUZZY_MIN_LENGTH = 4
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+EXACT_SCORE, PREFIX_SCORE, FUZZY_SCORE = 3, 2, 1
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, accent-folded words of `text`."""
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return WORD_RE.findall(folded)
+
+
+def deletes(term: str) -> Set[str]:
+    """Every string one deletion away from `term`."""
+    return {term[:index] + term[index + 1:] for index in range(len(term))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance(a, b) <= 1."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [index for index in range(len(a)) if a[index] != b[index]]
+        if len(diffs) == 1:
+            return True
+        return (
+            len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+        )
+    if len(a) > len(b):
+        a, b = b, a
+    # b is a with one letter inserted
+    index = 0
+    while index < len(a) and a[index] == b[index]:
+        index += 1
+    return a[index:] == b[index + 1:]
+
+
+class SearchDoc(NamedTuple):
+    """The searchable and facet fields of one menu item."""
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    category_id: Optional[int]
+    is_available: bool
+    is_vegetarian: bool
+    is_spicy: bool
+    calories: Optional[int]
+    preparation_time: Optional[int]
+    
+    @classmethod
+    def from_item(cls, item) -> "SearchDoc":
+        """From a MenuItem or a row with the same columns."""
+        return cls(
+            id=item.id,
+            name=item.name,
+            description=item.description,
+            price=item.price,
+            category_id=item.category_id,
+            is_available=bool(item.is_available),
+            is_vegetarian=bool(item.is_vegetarian),
+            is_spicy=bool(item.is_spicy),
+            calories=item.calories,
+            preparation_time=item.preparation_time
+        )
+
+
+class SearchFilters(NamedTuple):
+    """Facet filters; None means "any". Range filters exclude items with the field unset."""
+    vegetarian: Optional[bool] = None
+    spicy: Optional[bool] = None
+    available: Optional[bool] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_calories: Optional[int] = None
+    max_calories: Optional[int] = None
+    max_preparation_time: Optional[int] = None
+    
+    def accepts(self, doc: SearchDoc) -> bool:
+        if self.vegetarian is not None and doc.is_vegetarian != self.vegetarian:
+            return False
+        if self.spicy is not None and doc.is_spicy != self.spicy:
+            return False
+        if self.available is not None and doc.is_available != self.available:
+            return False
+        for value, low, high in (
+            (doc.price, self.min_price, self.max_price),
+            (doc.calories, self.min_calories, self.max_calories),
+            (doc.preparation_time, None, self.max_preparation_time),
+        ):
+            if low is None and high is None:
+                continue
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+
+class IndexData:
+    """One generation of the index; `MenuSearchIndex` swaps whole generations on rebuild."""
+    
+    def __init__(self):
+        self.docs: Dict[int, SearchDoc] = {}
+        # term -> {item id: best field weight}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.terms: List[str] = []  # sorted, for prefix lookups
+        # one-deletion variant -> terms, for typo lookups
+        self.variants: Dict[str, Set[str]] = {}
+        self.terms_of: Dict[int, Set[str]] = {}
+    
+    def add(self, doc: SearchDoc):
+        weights: Dict[str, int] = {}
+        for term in tokenize(doc.description):
+            weights[term] = DESCRIPTION_WEIGHT
+        for term in tokenize(doc.name):
+            weights[term] = NAME_WEIGHT
+        self.docs[doc.id] = doc
+        self.terms_of[doc.id] = set(weights)
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                insort(self.terms, term)
+                if len(term) >= FUZZY_MIN_LENGTH - 1:
+                    for variant in deletes(term) | {term}:
+                        self.variants.setdefault(variant, set()).add(term)
+            posting[doc.id] = weight
+    
+    def remove(self, item_id: int):
+        self.docs.pop(item_id, None)
+        for term in self.terms_of.pop(item_id, ()):
+            posting = self.postings[term]
+            posting.pop(item_id, None)
+            if posting:
+                continue
+            del self.postings[term]
+            del self.terms[bisect_left(self.terms, term)]
+            for variant in deletes(term) | {term}:
+                similar = self.variants.get(variant)
+                if similar is not None:
+                    similar.discard(term)
+                    if not similar:
+                        del self.variants[variant]
+    
+    def matches(self, word: str) -> Dict[int, int]:
+        """Item id -> best score for one query word."""
+        scores: Dict[int, int] = {}
+        
+        def collect(terms: Iterable[str], tier: int):
+            for term in terms:
+                for item_id, weight in self.postings[term].items():
+                    scores[item_id] = max(scores.get(item_id, 0), tier * weight)
+        
+        start = bisect_left(self.terms, word)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(word):
+            end += 1
+        prefixed = self.terms[start:end]
+        collect([term for term in prefixed if term == word], EXACT_SCORE)
+        collect([term for term in prefixed if term != word], PREFIX_SCORE)
+        
+        if len(word) >= FUZZY_MIN_LENGTH:
+            candidates: Set[str] = set()
+            for variant in deletes(word) | {word}:
+                candidates |= self.variants.get(variant, set())
+            collect(
+                [term for term in candidates if not term.startswith(word) and within_one_edit(word, term)],
+                FUZZY_SCORE
+            )
+        return scores
+
+
+class MenuSearchIndex:
+    """Inverted index of menu items with incremental updates."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = IndexData()
+        self.loaded = False
+        # Writes applied while a rebuild was loading, replayed onto its result
+        self._rebuilding = 0
+        self._pending: List[Tuple[int, Optional[SearchDoc]]] = []
+    
+    async def rebuild(self, db: AsyncSession):
+        """Rebuild the whole index from the database."""
+        with self._lock:
+            self._rebuilding += 1
+        try:
+            rows = (await db.execute(select(
+                MenuItem.id, MenuItem.name, MenuItem.description, MenuItem.price, MenuItem.category_id,
+                MenuItem.is_available, MenuItem.is_vegetarian, MenuItem.is_spicy,
+                MenuItem.calories, MenuItem.preparation_time
+            ))).all()
+            data = IndexData()
+            for row in rows:
+                data.add(SearchDoc.from_item(row))
+        except BaseException:
+            with self._lock:
+                self._finish_rebuild()
+            raise
+        
+        with self._lock:
+            for item_id, doc in self._pending:
+                data.remove(item_id)
+                if doc is not None:
+                    data.add(doc)
+            self._finish_rebuild()
+            self._data = data
+            self.loaded = True
+    
+    def _finish_rebuild(self):
+        """With the lock held: drop the pending writes once no rebuild needs them."""
+        self._rebuilding -= 1
+        if not self._rebuilding:
+            self._pending = []
+    
+    def _apply(self, item_id: int, doc: Optional[SearchDoc]):
+        with self._lock:
+            self._data.remove(item_id)
+            if doc is not None:
+                self._data.add(doc)
+            if self._rebuilding:
+                self._pending.append((item_id, doc))
+    
+    def upsert(self, item: MenuItem):
+        """Index a menu item that was just created or updated."""
+        self._apply(item.id, SearchDoc.from_item(item))
+    
+    def remove(self, item_id: int):
+        """Drop a menu item that was just deleted."""
+        self._apply(item_id, None)
+    
+    def set_available(self, item_ids: Iterable[int], is_available: bool):
+        """Flip the availability of indexed items; their terms are unchanged."""
+        with self._lock:
+            for item_id in item_ids:
+                doc = self._data.docs.get(item_id)
+                if doc is None:
+                    continue
+                doc = self._data.docs[item_id] = doc._replace(is_available=is_available)
+                if self._rebuilding:
+                    self._pending.append((item_id, doc))
+    
+    def search(self, query: str, filters: SearchFilters = SearchFilters(), limit: int = 20) -> Tuple[List[Tuple[SearchDoc, int]], dict]:
+        """
+        Return up to `limit` (doc, score) hits, best first, and facet
+        counts over every hit. An empty query returns every item that
+        passes the filters, by name.
+        """
+        words = tokenize(query)
+        with self._lock:
+            data = self._data
+            if words:
+                scores = data.matches(words[0])
+                for word in words[1:]:
+                    if not scores:
+                        break
+                    word_scores = data.matches(word)
+                    scores = {
+                        item_id: score + word_scores[item_id]
+                        for item_id, score in scores.items() if item_id in word_scores
+                    }
+            else:
+                scores = dict.fromkeys(data.docs, 0)
+            hits = [(data.docs[item_id], score) for item_id, score in scores.items()]
+        
+        hits = [(doc, score) for doc, score in hits if filters.accepts(doc)]
+        hits.sort(key=lambda hit: (-hit[1], hit[0].name.lower(), hit[0].id))
+        return hits[:limit], facet_counts(doc for doc, _ in hits)
+    
+    def clear(self):
+        with self._lock:
+            self._data = IndexData()
+            self.loaded = False
+
+
+def facet_counts(docs: Iterable[SearchDoc]) -> dict:
+    """Counts and value ranges of the facet fields over `docs`."""
+    total = vegetarian = spicy = available = 0
+    ranges = {"price": [None, None], "calories": [None, None], "preparation_time": [None, None]}
+    for doc in docs:
+        total += 1
+        vegetarian += doc.is_vegetarian
+        spicy += doc.is_spicy
+        available += doc.is_available
+        for field, bounds in ranges.items():
+            value = getattr(doc, field)
+            if value is None:
+                continue
+            bounds[0] = value if bounds[0] is None else min(bounds[0], value)
+            bounds[1] = value if bounds[1] is None else max(bounds[1], value)
+    return {
+        "total": total,
+        "vegetarian": vegetarian,
+        "spicy": spicy,
+        "available": available,
+        **{field: {"min": low, "max": high} for field, (low, high) in ranges.items()}
+    }
+
+
+# Global index shared by all requests in this worker
+menu_search = MenuSearchIndex()
@@ -0,0 +1,340 @@
+# app/utils/menu_transfer.py
+"""
+Bulk menu import and export, as CSV or NDJSON.
+
+Imports parse the request body as it arrives, so an upload is never held
+in memory whole. Valid rows are upserted MENU_TRANSFER_BATCH_SIZE at a
+time (one lookup, one INSERT and one UPDATE executemany per batch) and
+the import commits once at the end. Rows that fail validation are
+skipped and reported by line number; the rest are applied. Categories
+are matched by name, menu items by (category, name); item categories are
+resolved from a single query made up front.
+
+A field missing from a row (in CSV, an empty cell) keeps its current
+value on update and takes its default on insert.
+
+Exports stream from a server-side cursor, one chunk per batch, with the
+same columns an import accepts.
+"""
+import codecs
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Hashable, Iterable, List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.models import Category, MenuItem
+from app.schemas import CategoryImportRow, MenuItemImportRow
+
+TransferKind = Literal["categories", "items"]
+TransferFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+MAX_REPORTED_ERRORS = 1000
+
+# (line number, record, error): record is None when error is set
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """(line number, line) pairs from UTF-8 chunks split anywhere; lines keep their newline."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    number = 0
+    try:
+        async for chunk in chunks:
+            *lines, buffer = (buffer + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                number += 1
+                yield number, line + "\n"
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Upload is not valid UTF-8 (after line {number})"
+        )
+    if buffer:
+        yield number + 1, buffer
+
+
+def check_columns(names: Iterable[str], row_model) -> List[str]:
+    """Unknown column names in `names`, or the row model's required ones it lacks."""
+    names = set(names)
+    unknown = sorted(names - set(row_model.model_fields))
+    if unknown:
+        return [f"Unknown column(s): {', '.join(unknown)}"]
+    missing = [name for name, field in row_model.model_fields.items() if field.is_required() and name not in names]
+    if missing:
+        return [f"Missing column(s): {', '.join(missing)}"]
+    return []
+
+
+async def csv_records(chunks: AsyncIterator[bytes], row_model) -> AsyncIterator[Record]:
+    """
+    Records of a CSV upload with a header row. A record ends at the first
+    line break outside quotes, so quoted fields may span lines.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    quotes = 0
+    start = 0
+    async for number, line in read_lines(chunks):
+        if not pending:
+            start = number
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # inside a quoted field
+        fields = [field.strip() for field in next(csv.reader(pending), [])]
+        pending, quotes = [], 0
+        if not any(fields):
+            continue
+        
+        if header is None:
+            header = [field.lower() for field in fields]
+            problems = check_columns(header, row_model)
+            if len(set(header)) != len(header):
+                problems.append("Duplicate column names")
+            if problems:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="; ".join(problems))
+            continue
+        if len(fields) != len(header):
+            yield start, None, f"Expected {len(header)} fields, got {len(fields)}"
+            continue
+        yield start, {name: value for name, value in zip(header, fields) if value}, None
+    
+    if pending:
+        yield start, None, "Unterminated quoted field"
+    if header is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload has no header row")
+
+
+async def ndjson_records(chunks: AsyncIterator[bytes], row_model) -> AsyncIterator[Record]:
+    """Records of an NDJSON upload: one JSON object per line."""
+    async for number, line in read_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        problems = check_columns(record, row_model)
+        if problems:
+            yield number, None, problems[0]
+            continue
+        yield number, record, None
+
+
+PARSERS = {"csv": csv_records, "ndjson": ndjson_records}
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+class MenuTransfer(ABC):
+    """
+    Import and export of one table. An import validates rows and upserts
+    them a batch at a time in the caller's transaction; the caller commits.
+    """
+    model = None
+    row_model = None
+    
+    def __init__(self, db: AsyncSession, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.batch: Dict[Hashable, BaseModel] = {}
+        self.rows = self.created = self.updated = self.failed = 0
+        self.errors: List[dict] = []
+    
+    async def prepare(self):
+        """Load whatever every row needs, once, before the first batch."""
+    
+    @abstractmethod
+    def key(self, row: BaseModel) -> Hashable:
+        """The row's upsert key; raise ValueError to reject the row."""
+    
+    def values(self, row: BaseModel, fields: Iterable[str]) -> dict:
+        """Column values for `fields` of the row."""
+        return {field: getattr(row, field) for field in fields}
+    
+    @abstractmethod
+    async def existing_ids(self, keys: List[Hashable]) -> Dict[Hashable, int]:
+        """Ids of the rows already stored under `keys`."""
+    
+    @classmethod
+    def export_query(cls):
+        """One result row per table row, in the import's columns."""
+        return select(*[getattr(cls.model, name) for name in cls.row_model.model_fields]).order_by(cls.model.id)
+    
+    async def add(self, line: int, record: Optional[dict], error: Optional[str]):
+        self.rows += 1
+        if error is None:
+            try:
+                row = self.row_model.model_validate(record)
+                key = self.key(row)
+            except ValidationError as exc:
+                error = validation_message(exc)
+            except ValueError as exc:
+                error = str(exc)
+        if error is not None:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"line": line, "error": error})
+            return
+        
+        if key in self.batch:
+            # Apply the earlier row first; this one then updates it
+            await self.flush()
+        self.batch[key] = row
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+    
+    async def flush(self):
+        """Upsert the current batch: one lookup, then at most one INSERT and one UPDATE."""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, {}
+        ids = await self.existing_ids(list(batch))
+        all_fields = list(self.row_model.model_fields)
+        inserts = [self.values(row, all_fields) for key, row in batch.items() if key not in ids]
+        updates = [
+            {"id": ids[key], **self.values(row, row.model_fields_set)}
+            for key, row in batch.items() if key in ids
+        ]
+        if inserts:
+            await self.db.execute(insert(self.model), inserts)
+        if updates:
+            await self.db.execute(update(self.model), updates)
+        self.created += len(inserts)
+        self.updated += len(updates)
+    
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors
+        }
+
+
+class CategoryTransfer(MenuTransfer):
+    model = Category
+    row_model = CategoryImportRow
+    
+    def key(self, row: CategoryImportRow) -> str:
+        return row.name
+    
+    async def existing_ids(self, keys: List[str]) -> Dict[str, int]:
+        return dict((await self.db.execute(
+            select(Category.name, Category.id).where(Category.name.in_(keys))
+        )).all())
+
+
+class MenuItemTransfer(MenuTransfer):
+    model = MenuItem
+    row_model = MenuItemImportRow
+    
+    async def prepare(self):
+        self.category_ids: Dict[str, int] = dict((await self.db.execute(select(Category.name, Category.id))).all())
+    
+    def key(self, row: MenuItemImportRow) -> Tuple[int, str]:
+        category_id = self.category_ids.get(row.category)
+        if category_id is None:
+            raise ValueError(f"Unknown category '{row.category}'")
+        return category_id, row.name
+    
+    def values(self, row: MenuItemImportRow, fields: Iterable[str]) -> dict:
+        values = super().values(row, [field for field in fields if field != "category"])
+        if "category" in fields:
+            values["category_id"] = self.category_ids[row.category]
+        return values
+    
+    async def existing_ids(self, keys: List[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+        wanted = set(keys)
+        rows = await self.db.execute(
+            select(MenuItem.category_id, MenuItem.name, MenuItem.id)
+            .where(MenuItem.name.in_({name for _, name in keys}))
+            .order_by(MenuItem.id.desc())
+        )
+        # Descending, so if a key matches several items the oldest one wins
+        return {(row.category_id, row.name): row.id for row in rows if (row.category_id, row.name) in wanted}
+    
+    @classmethod
+    def export_query(cls):
+        columns = [
+            Category.name.label("category") if name == "category" else getattr(MenuItem, name)
+            for name in cls.row_model.model_fields
+        ]
+        return select(*columns).outerjoin(Category, MenuItem.category_id == Category.id).order_by(MenuItem.id)
+
+
+TRANSFERS = {"categories": CategoryTransfer, "items": MenuItemTransfer}
+
+
+async def import_rows(
+    db: AsyncSession,
+    kind: TransferKind,
+    fmt: TransferFormat,
+    chunks: AsyncIterator[bytes],
+    batch_size: int
+) -> dict:
+    """Upsert every valid row of an upload in one transaction; return the import report."""
+    transfer = TRANSFERS[kind](db, batch_size)
+    try:
+        await transfer.prepare()
+        async for line, record, error in PARSERS[fmt](chunks, transfer.row_model):
+            await transfer.add(line, record, error)
+        await transfer.flush()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import conflicted with a concurrent change; nothing was imported"
+        )
+    except BaseException:
+        await db.rollback()
+        raise
+    return transfer.report()
+
+
+def csv_chunk(rows: Iterable[Iterable]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        ["true" if value is True else "false" if value is False else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def export_rows(engine: AsyncEngine, kind: TransferKind, fmt: TransferFormat, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Stream a table as CSV or NDJSON on a connection of its own, so the
+    response can outlive the request's session.
+    """
+    transfer = TRANSFERS[kind]
+    async with engine.connect() as conn:
+        result = await conn.stream(transfer.export_query().execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            yield csv_chunk([transfer.row_model.model_fields])
+        async for rows in result.partitions():
+            if fmt == "csv":
+                yield csv_chunk(rows)
+            else:
+                yield "".join(json.dumps(dict(row._mapping)) + "\n" for row in rows).encode()
@@ -0,0 +1,107 @@
+# app/utils/order_cache.py
+"""
+Read-through cache of guest order-tracking payloads.
+
+Guests poll /api/orders/track/{order_number} every few seconds. The
+rendered payload is kept per order number in a bounded LRU. Every
+write to an order invalidates its entry, so the next poll sees the
+change. A TTL bounds staleness for writes handled by other worker
+processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+
+class TrackingCache:
+    """Bounded LRU of tracking payloads with hit/miss counters."""
+    
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        # When each order was last invalidated, for payloads read from a lagging replica
+        self._invalidated_at: "OrderedDict[str, float]" = OrderedDict()
+        # Bumped on every invalidation so a read that raced a write is not stored
+        self._generation = 0
+    
+    def get(self, order_number: str) -> Tuple[Optional[dict], int]:
+        """
+        Return (payload, generation). On a miss the payload is None and the
+        generation must be passed back to `put` with the freshly loaded payload.
+        """
+        with self._lock:
+            entry = self._entries.get(order_number)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(order_number)
+                self.hits += 1
+                return entry[1], self._generation
+            if entry is not None:
+                del self._entries[order_number]
+            self.misses += 1
+            return None, self._generation
+    
+    def put(self, order_number: str, payload: dict, generation: int, read_lag: float = 0.0):
+        """
+        Store a payload unless an invalidation happened since it was read.
+        
+        `read_lag` is how far behind the primary the payload's source may be
+        (replica reads); within that long of a write to the order the payload
+        may predate it, so it is not stored.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            invalidated_at = self._invalidated_at.get(order_number)
+            if invalidated_at is not None and time.monotonic() - invalidated_at < read_lag:
+                return
+            self._entries[order_number] = (time.monotonic(), payload)
+            self._entries.move_to_end(order_number)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, *order_numbers: str):
+        """Drop the payloads of orders that were just written."""
+        with self._lock:
+            self._generation += 1
+            now = time.monotonic()
+            for order_number in order_numbers:
+                self._entries.pop(order_number, None)
+                self._invalidated_at[order_number] = now
+                self._invalidated_at.move_to_end(order_number)
+            # Keep invalidation times for one TTL; replica lag bounds are far shorter
+            while self._invalidated_at:
+                oldest = next(iter(self._invalidated_at.values()))
+                if now - oldest < self.ttl_seconds and len(self._invalidated_at) <= self.max_entries:
+                    break
+                self._invalidated_at.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._invalidated_at.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Global cache shared by all requests in this worker
+tracking_cache = TrackingCache(
+    max_entries=settings.TRACKING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TRACKING_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,71 @@
+# app/utils/order_number.py
+"""
+Collision-free order numbers.
+
+Each worker process claims a block of sequence values from the
+`order_number_blocks` counter in its own short transaction, then hands
+them out from memory. Numbers are unique across workers, increase
+monotonically within a worker, and cost one database round trip per
+block rather than per order.
+"""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.models import OrderNumberBlock
+
+COUNTER_ID = 1
+
+
+class OrderNumberGenerator:
+    """Hands out `ORD-YYYYMMDD-NNNNNN` numbers from per-worker sequence blocks."""
+    
+    def __init__(self, block_size: int = 100):
+        self.block_size = block_size
+        self._lock = asyncio.Lock()
+        self._next = 0
+        self._end = 0
+    
+    async def _claim_block(self, bind: AsyncEngine):
+        """Reserve the next `block_size` sequence values for this worker."""
+        table = OrderNumberBlock.__table__
+        claim = update(table).where(
+            table.c.id == COUNTER_ID
+        ).values(
+            next_value=table.c.next_value + self.block_size
+        ).returning(table.c.next_value)
+        
+        async with bind.begin() as conn:
+            end = (await conn.execute(claim)).scalar()
+        
+        if end is None:
+            # First block ever: create the counter row. If another worker
+            # created it first, the primary key rejects ours and we claim normally.
+            try:
+                async with bind.begin() as conn:
+                    await conn.execute(insert(table).values(id=COUNTER_ID, next_value=1 + self.block_size))
+                end = 1 + self.block_size
+            except IntegrityError:
+                async with bind.begin() as conn:
+                    end = (await conn.execute(claim)).scalar()
+        
+        self._next = end - self.block_size
+        self._end = end
+    
+    async def next(self, bind: AsyncEngine) -> str:
+        """Return the next order number, claiming a new block when needed."""
+        async with self._lock:
+            if self._next >= self._end:
+                await self._claim_block(bind)
+            value = self._next
+            self._next += 1
+        
+        return f"ORD-{datetime.now().strftime('%Y%m%d')}-{value:06d}"
+
+
+# Global generator instance shared by all requests in this worker
+order_numbers = OrderNumberGenerator(block_size=settings.ORDER_NUMBER_BLOCK_SIZE)
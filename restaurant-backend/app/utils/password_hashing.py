@@ -0,0 +1,111 @@
+# app/utils/password_hashing.py
+"""
+Password hashing off the event loop.
+
+A bcrypt hash or check takes a few hundred milliseconds of CPU. Run
+inline in an `async def` handler it freezes every other request in the
+worker, so `login` and `register` await `password_hasher` instead, which
+runs bcrypt on a small dedicated thread pool (bcrypt releases the GIL,
+so threads run in parallel with the event loop).
+
+The pool runs at most PASSWORD_HASH_WORKERS hashes at once. Calls
+waiting for a thread are counted as the queue; once
+PASSWORD_HASH_MAX_QUEUE calls are waiting, new ones are rejected with
+503 instead of piling up behind a login burst.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.utils.auth import get_password_hash, verify_password
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt with queue-depth counters."""
+    
+    def __init__(self, workers: int = 2, max_queue: int = 32):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _submit(self) -> ThreadPoolExecutor:
+        """Count a new call as queued, or reject it when the queue is full."""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in attempts in progress, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+    
+    def _run_counted(self, fn: Callable[..., T], *args) -> T:
+        """Runs on a pool thread: move the call from queued to running."""
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+    
+    def _forget_cancelled(self, future: Future):
+        """A call cancelled while queued (client went away) never reaches a thread."""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+    
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        future = self._submit().submit(self._run_counted, fn, *args)
+        future.add_done_callback(self._forget_cancelled)
+        return await asyncio.wrap_future(future)
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+# Global pool shared by all requests in this worker
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
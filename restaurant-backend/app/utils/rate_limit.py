@@ -0,0 +1,168 @@
+# app/utils/rate_limit.py
+"""
+Login throttling.
+
+Every login attempt costs a bcrypt verification, so `login` asks
+`login_throttle` first and over-limit attempts get a 429 before any user
+lookup or hash. Attempts are limited per client IP and per submitted
+email (whether or not the account exists, so the limit reveals nothing).
+
+Limits use a sliding-window counter: hits are counted in fixed windows,
+and the previous window's count is weighted by how much of it still
+overlaps the sliding window. That needs two counters per key instead of
+a timestamp per attempt.
+
+Two backends are available via LOGIN_RATE_LIMIT_BACKEND:
+- "memory" (default): bounded per-worker counters; each worker enforces
+  the limits on its own.
+- "database": the rate_limit_counters table, shared by every worker.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import RateLimitCounter
+
+
+def retry_after(now: float, window: float, limit: int, current: int, previous: int) -> float:
+    """0 if one more hit fits the sliding window, else roughly how many seconds until it does."""
+    elapsed = (now % window) / window
+    if previous * (1 - elapsed) + current + 1 <= limit:
+        return 0.0
+    if current + 1 <= limit:
+        # Wait for the previous window's weight to drop far enough
+        return ((1 - (limit - current - 1) / previous) - elapsed) * window
+    return window - now % window
+
+
+class MemoryRateLimitStore:
+    """Per-worker (window, current, previous) counters in a bounded LRU."""
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+    
+    async def hit(self, key: str, limit: int, window: float, db: AsyncSession, now: Optional[float] = None) -> float:
+        """Count a hit if it fits the limit; return 0, or the seconds to wait if it doesn't."""
+        now = time.time() if now is None else now
+        window_index = int(now // window)
+        counted_window, current, previous = self._counters.get(key, (window_index, 0, 0))
+        if counted_window != window_index:
+            previous = current if counted_window == window_index - 1 else 0
+            current = 0
+        
+        wait = retry_after(now, window, limit, current, previous)
+        if not wait:
+            current += 1
+        self._counters[key] = (window_index, current, previous)
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+        return wait
+    
+    def clear(self):
+        self._counters.clear()
+
+
+class DatabaseRateLimitStore:
+    """
+    Shared counters on the rate_limit_counters table for multi-worker deployments.
+
+    Reads and increments run in their own short transactions on the request
+    session's engine. Attempts racing each other may overshoot a limit by
+    the number in flight at once, which is fine for throttling.
+    """
+    
+    def __init__(self, sweep_interval: float = 60):
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+    
+    async def _sweep(self, bind, window_index: int):
+        """Delete counters older than the previous window, at most once per sweep interval."""
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = time.monotonic()
+        table = RateLimitCounter.__table__
+        async with bind.begin() as conn:
+            await conn.execute(delete(table).where(table.c.window_start < window_index - 1))
+    
+    async def hit(self, key: str, limit: int, window: float, db: AsyncSession, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        window_index = int(now // window)
+        bind = db.bind
+        table = RateLimitCounter.__table__
+        await self._sweep(bind, window_index)
+        
+        async with bind.connect() as conn:
+            counts = dict((await conn.execute(
+                select(table.c.window_start, table.c.count).where(
+                    table.c.key == key,
+                    table.c.window_start >= window_index - 1
+                )
+            )).all())
+        wait = retry_after(now, window, limit, counts.get(window_index, 0), counts.get(window_index - 1, 0))
+        if wait:
+            return wait
+        
+        try:
+            async with bind.begin() as conn:
+                await conn.execute(insert(table).values(key=key, window_start=window_index, count=1))
+        except IntegrityError:
+            async with bind.begin() as conn:
+                await conn.execute(update(table).where(
+                    table.c.key == key,
+                    table.c.window_start == window_index
+                ).values(count=table.c.count + 1))
+        return 0.0
+    
+    def clear(self):
+        pass
+
+
+class LoginThrottle:
+    """Per-IP and per-account login limits on top of a rate-limit store."""
+    
+    def __init__(self, store, window_seconds: float, per_account: int, per_ip: int):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.per_account = per_account
+        self.per_ip = per_ip
+    
+    async def check(self, ip: Optional[str], email: str, db: AsyncSession):
+        """Count a login attempt, or raise 429 if the IP or account is over its limit."""
+        limits = [(f"login:account:{email.strip().lower()}", self.per_account)]
+        if ip:
+            limits.insert(0, (f"login:ip:{ip}", self.per_ip))
+        for key, limit in limits:
+            wait = await self.store.hit(key, limit, self.window_seconds, db)
+            if wait:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again later",
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))}
+                )
+    
+    def clear(self):
+        self.store.clear()
+
+
+def build_store():
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "database":
+        return DatabaseRateLimitStore()
+    return MemoryRateLimitStore()
+
+
+# Global throttle shared by all requests in this worker
+login_throttle = LoginThrottle(
+    build_store(),
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    per_account=settings.LOGIN_RATE_LIMIT_PER_ACCOUNT,
+    per_ip=settings.LOGIN_RATE_LIMIT_PER_IP
+)
@@ -0,0 +1,167 @@
+# app/utils/read_replica.py
+"""
+Read-replica routing for read-only endpoints.
+
+Routers opt in with `Depends(get_read_db)` instead of `get_async_db`. The
+session comes from the replica (DATABASE_REPLICA_URL) unless:
+- no replica is configured,
+- the replica's last lag check failed or exceeded REPLICA_MAX_LAG_SECONDS,
+- the client wrote recently: after any successful non-GET request the
+  `read_your_writes` middleware returns a "primary reads until" deadline,
+  both as a cookie and as the X-Primary-Reads-Until header. Browsers
+  calling the API cross-origin without credentials drop the cookie, so
+  the SPA echoes the header back instead. While either is valid that
+  client reads from the primary.
+- the replica can't be reached when the request starts.
+
+In all of those cases the primary session from `get_async_db` is used.
+"""
+import time
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import ReplicaSessionLocal, get_async_db, replica_engine
+
+STICKY_COOKIE = "primary_reads_until"
+STICKY_HEADER = "X-Primary-Reads-Until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Session.info key holding how far behind the primary a session may read
+LAG_BOUND_KEY = "replica_lag_bound"
+
+# Zero when every received WAL record is replayed, so an idle primary
+# doesn't look like a lagging replica
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Tracks whether the replica is reachable and fresh enough to read from."""
+    
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        session_factory: async_sessionmaker,
+        max_lag_seconds: float = 2,
+        check_interval: float = 5
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None  # None while down or unchecked
+        self._checked_at = float("-inf")
+    
+    @property
+    def lag_bound(self) -> float:
+        """Worst-case lag of a replica read: lag may grow by wall time between checks."""
+        return self.max_lag_seconds + self.check_interval
+    
+    async def measure_lag(self) -> float:
+        """Seconds the replica trails the primary."""
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        async with self.engine.connect() as conn:
+            return float(await conn.scalar(POSTGRES_LAG_QUERY))
+    
+    async def available(self) -> bool:
+        """Whether reads may go to the replica, re-checking lag at most once per interval."""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            # Claim the check first so concurrent requests don't all run it
+            self._checked_at = time.monotonic()
+            try:
+                self.lag = await self.measure_lag()
+            except (DBAPIError, OSError):
+                self.lag = None
+        return self.lag is not None and self.lag <= self.max_lag_seconds
+    
+    def mark_down(self):
+        """Route reads to the primary until the next successful check."""
+        self.lag = None
+        self._checked_at = time.monotonic()
+
+
+# Global router shared by all requests in this worker; None without a replica
+replica_router = (
+    ReplicaRouter(
+        replica_engine,
+        ReplicaSessionLocal,
+        max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.REPLICA_LAG_CHECK_SECONDS
+    )
+    if replica_engine is not None else None
+)
+
+
+def wrote_recently(request: Request) -> bool:
+    """True while the client's read-your-writes cookie or header is valid."""
+    now = time.time()
+    for deadline in (request.cookies.get(STICKY_COOKIE), request.headers.get(STICKY_HEADER)):
+        try:
+            if deadline and float(deadline) > now:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def read_lag_bound(db: AsyncSession) -> float:
+    """How stale reads through `db` may be: 0 for the primary."""
+    return db.info.get(LAG_BOUND_KEY, 0.0)
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    return LAG_BOUND_KEY in db.info
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Dependency for read-only endpoints: a replica session when safe, else the primary one."""
+    router = replica_router
+    if router is None or wrote_recently(request) or not await router.available():
+        yield db
+        return
+    
+    # Connect before handing the session out, so a replica that went down
+    # since the last lag check costs a fallback, not a failed request
+    replica_db = router.session_factory()
+    try:
+        await replica_db.connection()
+    except (DBAPIError, OSError):
+        await replica_db.close()
+        router.mark_down()
+        yield db
+        return
+    
+    async with replica_db:
+        replica_db.info[LAG_BOUND_KEY] = router.lag_bound
+        try:
+            yield replica_db
+        except DBAPIError:
+            # The handler already ran part way, so this request can't be
+            # replayed; later ones go to the primary until the next check
+            router.mark_down()
+            raise
+
+
+async def read_your_writes(request: Request, call_next):
+    """HTTP middleware: pin a client's reads to the primary after it writes."""
+    response = await call_next(request)
+    if replica_router is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+        deadline = str(time.time() + settings.REPLICA_STICKY_SECONDS)
+        response.headers[STICKY_HEADER] = deadline
+        response.set_cookie(
+            STICKY_COOKIE,
+            deadline,
+            max_age=int(settings.REPLICA_STICKY_SECONDS) + 1,
+            httponly=True,
+            samesite="lax"
+        )
+    return response
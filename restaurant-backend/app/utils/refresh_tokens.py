@@ -0,0 +1,108 @@
+# app/utils/refresh_tokens.py
+"""
+Rotating refresh tokens.
+
+Login hands out an opaque refresh token next to the short-lived access
+token. POST /api/auth/refresh trades it for a new access token and a new
+refresh token without touching bcrypt; the old refresh token is spent.
+
+Only a SHA-256 of each token is stored, in the refresh_tokens table so
+every worker sees it. All tokens descending from one login share a
+family: presenting a spent token again means it leaked, so the whole
+family is revoked. Logout revokes the family too. Expired rows are swept
+at most once per sweep interval.
+"""
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import RefreshToken
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenStore:
+    """Issues, rotates and revokes refresh tokens on the refresh_tokens table."""
+    
+    def __init__(self, ttl_seconds: float, sweep_interval: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+    
+    async def _sweep(self, db: AsyncSession):
+        """Delete expired tokens, at most once per sweep interval."""
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = time.monotonic()
+        table = RefreshToken.__table__
+        await db.execute(delete(table).where(table.c.expires_at < datetime.now(timezone.utc)))
+    
+    async def _insert(self, db: AsyncSession, user_id: int, family_id: str) -> str:
+        token = secrets.token_urlsafe(32)
+        await db.execute(insert(RefreshToken.__table__).values(
+            token_hash=hash_token(token),
+            user_id=user_id,
+            family_id=family_id,
+            rotated=False,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        ))
+        return token
+    
+    async def issue(self, db: AsyncSession, user_id: int) -> str:
+        """Start a new family for a fresh login and return its first token."""
+        await self._sweep(db)
+        token = await self._insert(db, user_id, secrets.token_hex(16))
+        await db.commit()
+        return token
+    
+    async def rotate(self, db: AsyncSession, token: str) -> Optional[Tuple[int, str]]:
+        """
+        Spend `token` and return (user_id, new token), or None if it is
+        unknown, expired or already spent (which revokes its family).
+        """
+        table = RefreshToken.__table__
+        token_hash = hash_token(token)
+        # Claim the token in one statement so concurrent refreshes can't both spend it
+        claimed = await db.execute(update(table).where(
+            table.c.token_hash == token_hash,
+            table.c.rotated == False,
+            table.c.expires_at > datetime.now(timezone.utc)
+        ).values(rotated=True))
+        row = (await db.execute(
+            select(table.c.user_id, table.c.family_id, table.c.rotated).where(table.c.token_hash == token_hash)
+        )).first()
+        
+        if claimed.rowcount != 1:
+            if row is not None and row.rotated:
+                await db.execute(delete(table).where(table.c.family_id == row.family_id))
+            await db.commit()
+            return None
+        
+        new_token = await self._insert(db, row.user_id, row.family_id)
+        await db.commit()
+        return row.user_id, new_token
+    
+    async def revoke(self, db: AsyncSession, token: str):
+        """Revoke the login `token` belongs to (logout)."""
+        table = RefreshToken.__table__
+        family_id = await db.scalar(select(table.c.family_id).where(table.c.token_hash == hash_token(token)))
+        if family_id is not None:
+            await db.execute(delete(table).where(table.c.family_id == family_id))
+            await db.commit()
+    
+    async def revoke_user(self, db: AsyncSession, user_id: int):
+        """Revoke every login of a user; the caller commits."""
+        table = RefreshToken.__table__
+        await db.execute(delete(table).where(table.c.user_id == user_id))
+
+
+# Global store shared by all requests in this worker
+refresh_token_store = RefreshTokenStore(ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60)
@@ -0,0 +1,122 @@
+# app/utils/user_cache.py
+"""
+Caches of authenticated users.
+
+Every authenticated request resolves its token to a user, and most
+handlers only need the id and role. `get_current_user` keeps a small
+`UserSnapshot` per subject (email) in `user_cache` instead of loading the
+row each time; handlers that need the full row depend on
+`get_current_user_record`. With AUTH_TRUST_TOKEN_CLAIMS the snapshot comes
+from the token itself and only the user's token version is looked up,
+through `token_versions` (keyed by user id).
+
+Any write to a user must call `invalidate_user(user)` after committing;
+role or is_active changes must also bump `token_version` first. TTLs bound
+staleness for writes made by other worker processes or scripts.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from app.config import settings
+from app.models import User, UserRole
+
+
+class UserSnapshot(NamedTuple):
+    """The parts of a user that authorization needs."""
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+    token_version: int
+    
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            token_version=user.token_version
+        )
+
+
+class UserCache:
+    """Bounded TTL LRU of per-user values with hit/miss counters."""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        # Bumped on every invalidation so a read that raced a write is not stored
+        self._generation = 0
+    
+    def get(self, key: Any) -> Tuple[Optional[Any], int]:
+        """
+        Return (value, generation). On a miss the value is None and the
+        generation must be passed back to `put` with the freshly loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], self._generation
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None, self._generation
+    
+    def put(self, key: Any, value: Any, generation: int):
+        """Store a value unless an invalidation happened since it was read."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, *keys: Any):
+        """Drop the values of users that were just written."""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Global caches shared by all requests in this worker
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+token_versions = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_VERSION_TTL_SECONDS
+)
+
+
+def invalidate_user(user: User):
+    """Drop everything cached about a user that was just written."""
+    user_cache.invalidate(user.email)
+    token_versions.invalidate(user.id)
@@ -1,6 +1,8 @@
 # app/websocket.py
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
 import json
 import logging
 
@@ -19,6 +21,15 @@ class ConnectionManager:
         }
         # Map order IDs to customer connections
         self.order_subscriptions: Dict[int, Set[WebSocket]] = {}
+        # Server-Sent Events listeners per order, plus a short per-order log
+        # of recent events so a reconnecting stream can resume (Last-Event-ID)
+        self.order_listeners: Dict[int, Set[asyncio.Queue]] = {}
+        self.order_events: "OrderedDict[int, Deque[Tuple[int, dict]]]" = OrderedDict()
+        self.last_event_id = 0
+        # Newest event id among order logs evicted whole
+        self.evicted_through = 0
+        self.max_logged_orders = 1000
+        self.max_events_per_order = 20
     
     async def connect(self, websocket: WebSocket, role: str = "customer"):
         """Accept and store a new WebSocket connection."""
@@ -46,6 +57,56 @@ class ConnectionManager:
             self.order_subscriptions[order_id] = set()
         self.order_subscriptions[order_id].add(websocket)
     
+    def listen_to_order(self, order_id: int) -> asyncio.Queue:
+        """Register an SSE listener; events arrive as (event_id, message) tuples."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self.order_listeners.setdefault(order_id, set()).add(queue)
+        return queue
+    
+    def stop_listening(self, order_id: int, queue: asyncio.Queue):
+        """Remove an SSE listener."""
+        listeners = self.order_listeners.get(order_id)
+        if listeners is not None:
+            listeners.discard(queue)
+            if not listeners:
+                del self.order_listeners[order_id]
+    
+    def events_since(self, order_id: int, last_event_id: int) -> Optional[List[Tuple[int, dict]]]:
+        """
+        Logged events for an order newer than `last_event_id`, or None if
+        some of them may have been evicted from the log.
+        """
+        log = self.order_events.get(order_id)
+        if log is None:
+            return [] if last_event_id >= self.evicted_through else None
+        # A full log may have dropped events older than its first one
+        if len(log) == log.maxlen and log[0][0] > last_event_id + 1:
+            return None
+        return [event for event in log if event[0] > last_event_id]
+    
+    def publish_order_event(self, order_id: int, message: dict):
+        """Log an order event and hand it to the order's SSE listeners."""
+        self.last_event_id += 1
+        event = (self.last_event_id, message)
+        
+        log = self.order_events.get(order_id)
+        if log is None:
+            log = self.order_events[order_id] = deque(maxlen=self.max_events_per_order)
+            while len(self.order_events) > self.max_logged_orders:
+                _, evicted = self.order_events.popitem(last=False)
+                if evicted:
+                    self.evicted_through = max(self.evicted_through, evicted[-1][0])
+        else:
+            self.order_events.move_to_end(order_id)
+        log.append(event)
+        
+        for queue in self.order_listeners.get(order_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled stream resumes from the log once it drains
+                logger.warning(f"SSE listener for order {order_id} is full; dropping event")
+    
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send a message to a specific connection."""
         try:
@@ -72,6 +133,8 @@ class ConnectionManager:
         """Broadcast order updates to subscribed connections and all admins."""
         disconnected = set()
         
+        self.publish_order_event(order_id, message)
+        
         # Send to order subscribers
         if order_id in self.order_subscriptions:
             for connection in self.order_subscriptions[order_id]:
@@ -88,17 +151,44 @@ class ConnectionManager:
         for conn in disconnected:
             self.disconnect(conn)
     
+    async def broadcast_order_updates(self, orders: List[dict], message_type: str = "orders_status_updated"):
+        """
+        Broadcast many order updates; only the admin fan-out is coalesced.
+        
+        Admins get every order in a single `message_type` message. Order
+        subscribers and SSE streams follow single orders, so they get the
+        usual per-order `order_status_updated` message for each one.
+        """
+        disconnected = set()
+        
+        for order in orders:
+            message = {"type": "order_status_updated", "order": order}
+            self.publish_order_event(order["id"], message)
+            for connection in self.order_subscriptions.get(order["id"], ()):
+                try:
+                    await connection.send_json(message)
+                except Exception as e:
+                    logger.error(f"Error sending order update: {e}")
+                    disconnected.add(connection)
+        
+        await self.broadcast_to_role({"type": message_type, "orders": orders}, "admin")
+        
+        # Clean up disconnected clients
+        for conn in disconnected:
+            self.disconnect(conn)
+    
     async def broadcast_new_order(self, message: dict):
         """Broadcast new order notification to all admins."""
         await self.broadcast_to_role(message, "admin")
     
     async def broadcast_to_all(self, message: dict):
-        """Broadcast message to all connected clients."""
+        """Broadcast message to all connected clients, serialized once."""
+        text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
         disconnected = set()
         
         for connection in self.active_connections["all"]:
             try:
-                await connection.send_json(message)
+                await connection.send_text(text)
             except Exception as e:
                 logger.error(f"Error broadcasting to all: {e}")
                 disconnected.add(connection)
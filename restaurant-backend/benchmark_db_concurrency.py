@@ -0,0 +1,129 @@
+"""
+Concurrent-request throughput: synchronous Session vs AsyncSession.
+
+Fires the same burst of concurrent requests at two endpoints that run one
+slow query each. `/sync` uses the old pattern (a blocking Session inside an
+`async def` route), `/async` uses the AsyncSession every router now uses.
+While each burst runs, a watcher task records the worst event-loop stall,
+i.e. how long every other request and WebSocket in the worker was frozen.
+
+Keep --concurrency below the sync pool size (15): past it, `/sync` blocks
+the loop waiting for a connection that only a loop callback can return,
+and stalls until the pool timeout.
+
+Usage:
+    python benchmark_db_concurrency.py
+    python benchmark_db_concurrency.py --database-url sqlite:///bench.db --requests 200 --delay 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import async_database_url
+
+
+def slow_query(url: str) -> str:
+    """A query that takes `:delay` seconds on the database side."""
+    if url.startswith("sqlite"):
+        return "SELECT sleep(:delay)"
+    return "SELECT pg_sleep(:delay)"
+
+
+def add_sqlite_sleep(engine):
+    """SQLite has no sleep(); register one on every new connection."""
+    @event.listens_for(engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep", 1, time.sleep)
+
+
+def build_app(url: str, delay: float):
+    """Return the benchmark app and the async engine to dispose afterwards."""
+    engine = create_engine(url)
+    async_engine = create_async_engine(async_database_url(url))
+    if url.startswith("sqlite"):
+        add_sqlite_sleep(engine)
+        add_sqlite_sleep(async_engine.sync_engine)
+    SessionLocal = sessionmaker(bind=engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    query = text(slow_query(url))
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route(db: Session = Depends(get_db)):
+        db.execute(query, {"delay": delay})
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(query, {"delay": delay})
+        return {"ok": True}
+
+    return app, async_engine
+
+
+async def burst(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    """Run `requests` GETs, `concurrency` at a time; return (req/s, worst loop stall)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    async def watch_loop(tick: float = 0.005):
+        worst = 0.0
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            worst = max(worst, time.perf_counter() - start - tick)
+        return worst
+
+    watcher = asyncio.create_task(watch_loop())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    return requests / elapsed, await watcher
+
+
+async def main(args):
+    app, async_engine = build_app(args.database_url, args.delay)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{args.requests} requests, {args.concurrency} concurrent, {args.delay * 1000:.0f} ms query")
+        print(f"{'session':<10}{'req/s':>10}{'stall ms':>10}")
+        for label, path in (("sync", "/sync"), ("async", "/async")):
+            await client.get(path)  # warm up the pool
+            throughput, stall = await burst(client, path, args.requests, args.concurrency)
+            print(f"{label:<10}{throughput:>10.1f}{stall * 1000:>10.1f}")
+    # aiosqlite connections run in non-daemon threads; close them so we can exit
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds each query takes")
+    asyncio.run(main(parser.parse_args()))
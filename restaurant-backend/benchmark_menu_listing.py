@@ -0,0 +1,120 @@
+"""
+Menu page latency against item count: lazy vs selectin vs joined category loading.
+
+Seeds a scratch database with menu items, then times a `/menu` page that
+returns MenuItemResponse (which nests the category) with three loading
+strategies:
+- lazy: one query for the items, then one per category as serialization
+  touches `item.category` (what the sync router used to do)
+- selectin: a second query loads all categories of the page at once
+- joined: the categories come with the items in one statement (what
+  `get_menu_items` does now)
+
+Each row reports the mean page latency and the statements one page runs.
+
+Usage:
+    python benchmark_menu_listing.py
+    python benchmark_menu_listing.py --sizes 10 50 100 --items-per-category 1 --repeat 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, joinedload, lazyload, selectinload
+
+from app.database import Base, async_database_url
+from app.models import Category, MenuItem
+from app.schemas import MenuItemResponse
+
+STRATEGIES = {
+    "lazy": lazyload(MenuItem.category),
+    "selectin": selectinload(MenuItem.category),
+    "joined": joinedload(MenuItem.category),
+}
+
+
+def seed(url: str, items: int, items_per_category: int):
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        categories = [Category(name=f"Category {index}") for index in range(-(-items // items_per_category))]
+        db.add_all(categories)
+        db.flush()
+        db.add_all([
+            MenuItem(
+                name=f"Dish {index}",
+                description="A dish",
+                price=5.0 + index % 20,
+                category_id=categories[index // items_per_category].id
+            )
+            for index in range(items)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+def build_app(async_engine):
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/menu/{strategy}", response_model=List[MenuItemResponse])
+    async def menu_page(strategy: str, limit: int, db: AsyncSession = Depends(get_async_db)):
+        query = select(MenuItem).options(STRATEGIES[strategy]).order_by(MenuItem.id).limit(limit)
+        items = (await db.scalars(query)).all()
+        # Serialize inside run_sync so lazy loads can run (they'd raise under asyncio)
+        return await db.run_sync(lambda _: [MenuItemResponse.model_validate(item) for item in items])
+
+    return app
+
+
+async def main(args):
+    url = args.database_url
+    scratch = None
+    if url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        url = f"sqlite:///{scratch}"
+    seed(url, max(args.sizes), args.items_per_category)
+
+    async_engine = create_async_engine(async_database_url(url))
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *_: statements.append(1))
+    transport = httpx.ASGITransport(app=build_app(async_engine))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{args.items_per_category} items per category, {args.repeat} pages per row")
+        print(f"{'items':>6}  {'strategy':<10}{'ms/page':>10}{'statements':>12}")
+        for size in args.sizes:
+            for strategy in STRATEGIES:
+                path = f"/menu/{strategy}?limit={size}"
+                (await client.get(path)).raise_for_status()  # warm up
+                statements.clear()
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    (await client.get(path)).raise_for_status()
+                elapsed = time.perf_counter() - start
+                print(f"{size:>6}  {strategy:<10}{elapsed / args.repeat * 1000:>10.2f}{len(statements) // args.repeat:>12}")
+    # aiosqlite connections run in non-daemon threads; close them so we can exit
+    await async_engine.dispose()
+    if scratch:
+        os.remove(scratch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="scratch database (its tables are dropped); default: temp SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100], help="items per page")
+    parser.add_argument("--items-per-category", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
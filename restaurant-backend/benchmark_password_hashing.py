@@ -0,0 +1,106 @@
+"""
+Latency of other requests during a login burst: inline bcrypt vs the hashing pool.
+
+Fires a burst of concurrent logins at one of two endpoints while a probe
+requests a trivial `/ping` route every few milliseconds. `/login-inline`
+verifies the password on the event loop, as `login` used to;
+`/login-pool` awaits `password_hasher`, as `login` does now. The probe's
+latency is what every other request in the worker sees during the burst.
+
+Usage:
+    python benchmark_password_hashing.py
+    python benchmark_password_hashing.py --logins 50 --concurrency 20 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.utils.auth import get_password_hash, verify_password
+from app.utils.password_hashing import PasswordHasher
+
+
+def build_app(hasher: PasswordHasher):
+    hashed = get_password_hash("benchmark123")
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/login-inline")
+    async def login_inline():
+        return {"ok": verify_password("benchmark123", hashed)}
+
+    @app.post("/login-pool")
+    async def login_pool():
+        return {"ok": await hasher.verify("benchmark123", hashed)}
+
+    return app
+
+
+async def burst(client: httpx.AsyncClient, path: str, logins: int, concurrency: int, interval: float):
+    """Run the logins; return (logins/s, ping latencies in seconds)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            response = await client.post(path)
+            response.raise_for_status()
+
+    async def probe():
+        # Latency counts from when each ping was due, so time the loop spent
+        # blocked before it could send the ping is included; pings that fell
+        # due while it was blocked are recorded too (coordinated omission)
+        latencies = []
+        due = time.perf_counter() + interval
+        while True:
+            await asyncio.sleep(max(due - time.perf_counter(), 0))
+            await client.get("/ping")
+            latency = time.perf_counter() - due
+            while latency > 0:
+                latencies.append(latency)
+                latency -= interval
+                due += interval
+            due = max(due, time.perf_counter())
+            if done.is_set():
+                return latencies
+
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(0)  # let the probe schedule its first ping
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    return logins / elapsed, await prober
+
+
+async def main(args):
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.logins)
+    transport = httpx.ASGITransport(app=build_app(hasher))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{args.logins} logins, {args.concurrency} concurrent, {args.workers} hashing threads")
+        print(f"{'login':<10}{'logins/s':>10}{'ping p50':>10}{'ping p99':>10}{'ping max':>10}  (ms)")
+        for label, path in (("inline", "/login-inline"), ("pool", "/login-pool")):
+            throughput, latencies = await burst(client, path, args.logins, args.concurrency, args.interval)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"{label:<10}{throughput:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+                f"{p99 * 1000:>10.1f}{latencies[-1] * 1000:>10.1f}"
+            )
+    print(f"pool stats: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2, help="hashing threads")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between pings")
+    asyncio.run(main(parser.parse_args()))
@@ -2,18 +2,108 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
 
-from app.database import engine, Base
+from app.database import async_engine, Base, AsyncSessionLocal
 from app.routers import auth, menu, orders, restaurant, websocket, reservations, tables, upload
 from app.config import settings
+from app.models import IdempotencyRecord, Order, User, IDEMPOTENCY_ADDED_COLUMNS, ORDER_HISTORY_INDEXES, USER_ADDED_COLUMNS
+from app.utils.archive import archive_orders
+from app.utils.kitchen_queue import kitchen_queue
+from app.utils.menu_search import menu_search
+from app.utils.password_hashing import password_hasher
+from app.utils.read_replica import STICKY_HEADER, read_your_writes
+
+
+async def load_kitchen_queue():
+    """Build the in-memory kitchen board from the database."""
+    async with AsyncSessionLocal() as db:
+        await kitchen_queue.load(db)
+
+
+async def load_menu_search():
+    """Build the in-memory menu search index from the database."""
+    async with AsyncSessionLocal() as db:
+        await menu_search.rebuild(db)
+
+
+async def run_archiver():
+    """Move old finished orders into the archive tables."""
+    async with AsyncSessionLocal() as db:
+        return await archive_orders(db, settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE)
+
+
+def create_schema(connection):
+    """Create missing tables and order-history indexes (run via run_sync)."""
+    Base.metadata.create_all(bind=connection)
+    # create_all skips indexes on tables that already exist, so add the
+    # order-history pagination indexes to databases created before them
+    for index in Order.__table__.indexes:
+        if index.name in ORDER_HISTORY_INDEXES:
+            index.create(bind=connection, checkfirst=True)
+    # Same for columns added to tables after they shipped
+    for model, added_columns in ((User, USER_ADDED_COLUMNS), (IdempotencyRecord, IDEMPOTENCY_ADDED_COLUMNS)):
+        existing = {column["name"] for column in inspect(connection).get_columns(model.__tablename__)}
+        for name in added_columns:
+            if name not in existing:
+                column_ddl = CreateColumn(model.__table__.c[name]).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {model.__tablename__} ADD COLUMN {column_ddl}"))
+
+
+async def archive_periodically(interval: int):
+    """Run the archiver every `interval` seconds."""
+    while True:
+        try:
+            moved = await run_archiver()
+            if moved:
+                print(f"📦 Archived {moved} orders")
+        except Exception as e:
+            print(f"⚠️ Order archiving failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def resync_kitchen_queue(interval: int):
+    """Periodically rebuild the kitchen board to pick up other workers' writes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_kitchen_queue()
+        except Exception as e:
+            print(f"⚠️ Kitchen queue resync failed: {e}")
+
+
+async def resync_menu_search(interval: int):
+    """Periodically rebuild the menu search index to pick up other workers' writes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_menu_search()
+        except Exception as e:
+            print(f"⚠️ Menu search resync failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting up...")
-    Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as connection:
+        await connection.run_sync(create_schema)
+    await load_kitchen_queue()
+    await load_menu_search()
+    background_tasks = []
+    if settings.KITCHEN_QUEUE_RESYNC_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(resync_kitchen_queue(settings.KITCHEN_QUEUE_RESYNC_SECONDS)))
+    if settings.MENU_SEARCH_RESYNC_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(resync_menu_search(settings.MENU_SEARCH_RESYNC_SECONDS)))
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(archive_periodically(settings.ARCHIVE_INTERVAL_SECONDS)))
     yield
+    for task in background_tasks:
+        task.cancel()
+    password_hasher.shutdown()
+    await async_engine.dispose()
     print("🔄 Shutting down...")
 
 # Create FastAPI app
@@ -32,8 +122,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", STICKY_HEADER],
 )
 
+# Pin a client's reads to the primary right after its own writes
+app.middleware("http")(read_your_writes)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(menu.router, prefix="/api/menu", tags=["Menu"])
@@ -3,32 +3,61 @@
 Pytest configuration and fixtures for testing.
 Run with: pytest -v
 """
+import os
+import tempfile
+
+# Always point the app's own engine at SQLite, even when DATABASE_URL is
+# exported (e.g. docker), so the lifespan hook never touches a real database
+os.environ["DATABASE_URL"] = "sqlite://"
+# Tests drive the kitchen queue and archiver explicitly; no background tasks
+os.environ["KITCHEN_QUEUE_RESYNC_SECONDS"] = "0"
+os.environ["MENU_SEARCH_RESYNC_SECONDS"] = "0"
+os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from main import app
-from app.database import Base, get_db
+from app.database import Base, async_database_url, get_async_db
 from app.models import User, Category, MenuItem, Restaurant
 from app.utils.auth import get_password_hash
+from app.utils.menu_cache import invalidate_menu_caches
+from app.utils.kitchen_queue import kitchen_queue
+from app.utils.menu_search import menu_search
+from app.utils.order_cache import tracking_cache
+from app.utils.rate_limit import login_throttle
+from app.utils.user_cache import token_versions, user_cache
 
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Use a throwaway SQLite file: fixtures write through a sync session while
+# the app reads and writes the same database through aiosqlite
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: each TestClient runs its own event loop, so never reuse connections
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test."""
     Base.metadata.create_all(bind=engine)
+    invalidate_menu_caches()
+    tracking_cache.clear()
+    kitchen_queue.clear()
+    menu_search.clear()
+    user_cache.clear()
+    token_versions.clear()
+    login_throttle.clear()
     session = TestingSessionLocal()
     try:
         yield session
@@ -40,18 +69,31 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with overridden DB dependency."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
     
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_counter():
+    """Collect every SQL statement the app executes on the test database."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture
 def admin_user(db_session):
     """Create an admin user for testing."""
@@ -0,0 +1,110 @@
+# tests/test_archive.py
+"""
+Order archiving tests.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from app.utils.archive import archive_orders
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def add_order(db_session, customer, menu_item, number, order_status, age_days):
+    order = Order(
+        order_number=number,
+        customer_id=customer.id,
+        total_amount=menu_item.price,
+        status=order_status,
+        created_at=datetime.now(timezone.utc) - timedelta(days=age_days),
+        order_items=[OrderItem(menu_item_id=menu_item.id, quantity=1, price=menu_item.price)]
+    )
+    db_session.add(order)
+    return order
+
+
+def run_archive(**kwargs):
+    async def main():
+        async with TestingAsyncSessionLocal() as db:
+            return await archive_orders(db, **kwargs)
+
+    return asyncio.run(main())
+
+
+def seed(db_session, customer, menu_item):
+    add_order(db_session, customer, menu_item, "ORD-OLD-DELIVERED-1", OrderStatus.DELIVERED, 200)
+    add_order(db_session, customer, menu_item, "ORD-OLD-DELIVERED-2", OrderStatus.DELIVERED, 150)
+    add_order(db_session, customer, menu_item, "ORD-OLD-CANCELLED", OrderStatus.CANCELLED, 120)
+    add_order(db_session, customer, menu_item, "ORD-OLD-PENDING", OrderStatus.PENDING, 300)
+    add_order(db_session, customer, menu_item, "ORD-RECENT", OrderStatus.DELIVERED, 1)
+    db_session.commit()
+
+
+def test_archive_moves_only_old_finished_orders(db_session, customer_user, sample_menu_item):
+    seed(db_session, customer_user, sample_menu_item)
+
+    moved = run_archive(older_than_days=90, batch_size=2)
+
+    assert moved == 3
+    assert {order.order_number for order in db_session.query(Order)} == {"ORD-OLD-PENDING", "ORD-RECENT"}
+    assert db_session.query(OrderItem).count() == 2
+    assert db_session.query(ArchivedOrder).count() == 3
+    assert db_session.query(ArchivedOrderItem).count() == 3
+    assert run_archive(older_than_days=90) == 0
+
+
+def test_history_reads_include_archive(
+    client, db_session, admin_token, customer_token, customer_user, sample_menu_item, restaurant_info
+):
+    seed(db_session, customer_user, sample_menu_item)
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    customer = {"Authorization": f"Bearer {customer_token}"}
+
+    response = client.post("/api/orders/archive", headers=admin)
+    assert response.json()["archived"] == 3
+
+    tracked = client.get("/api/orders/track/ORD-OLD-CANCELLED").json()
+    assert tracked["status"] == "cancelled"
+    assert tracked["items"][0]["name"] == sample_menu_item.name
+
+    my_orders = client.get("/api/orders/my-orders", headers=customer).json()
+    assert [order["order_number"] for order in my_orders] == [
+        "ORD-RECENT", "ORD-OLD-CANCELLED", "ORD-OLD-DELIVERED-2", "ORD-OLD-DELIVERED-1", "ORD-OLD-PENDING"
+    ]
+
+    paged = []
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/orders", params=params, headers=admin)
+        paged.extend(order["order_number"] for order in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paged == [order["order_number"] for order in my_orders]
+
+    archived_id = db_session.query(ArchivedOrder.id).filter_by(order_number="ORD-OLD-DELIVERED-1").scalar()
+    assert client.get(f"/api/orders/{archived_id}", headers=admin).json()["order_number"] == "ORD-OLD-DELIVERED-1"
+
+    stats = client.get("/api/restaurant/stats", headers=admin).json()
+    assert stats["total_orders"] == 5
+    assert stats["completed_orders"] == 3
+    assert stats["total_revenue"] == round(sample_menu_item.price * 3, 2)
+
+
+def test_concurrent_runs_split_the_work(db_session, customer_user, sample_menu_item):
+    for index in range(6):
+        add_order(db_session, customer_user, sample_menu_item, f"ORD-OLD-{index}", OrderStatus.DELIVERED, 100 + index)
+    db_session.commit()
+
+    async def one_run():
+        async with TestingAsyncSessionLocal() as db:
+            return await archive_orders(db, older_than_days=90, batch_size=2)
+
+    async def main():
+        return await asyncio.gather(one_run(), one_run())
+
+    assert sum(asyncio.run(main())) == 6
+    assert db_session.query(Order).count() == 0
+    assert db_session.query(ArchivedOrder).count() == 6
+    assert db_session.query(ArchivedOrderItem).count() == 6
@@ -0,0 +1,135 @@
+# tests/test_idempotency.py
+"""
+Idempotency store tests.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.idempotency import (
+    DatabaseIdempotencyStore,
+    MemoryIdempotencyStore,
+    StoredResponse,
+)
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def run_concurrent_duplicates(store, db):
+    """Start two requests with one key; the second must wait for the first."""
+    events = []
+
+    async def first():
+        assert await store.begin("k", db, wait_seconds=5) is None
+        events.append("first claimed")
+        await asyncio.sleep(0.1)
+        events.append("first done")
+        await store.complete("k", StoredResponse(201, {"id": 1}), db)
+
+    async def second():
+        await asyncio.sleep(0.01)
+        replay = await store.begin("k", db, wait_seconds=5)
+        events.append("second replayed")
+        return replay
+
+    async def main():
+        _, replay = await asyncio.gather(first(), second())
+        return replay
+
+    replay = asyncio.run(main())
+    assert events == ["first claimed", "first done", "second replayed"]
+    assert replay == StoredResponse(201, {"id": 1})
+
+
+def test_memory_store_waits_for_in_flight_duplicate():
+    run_concurrent_duplicates(MemoryIdempotencyStore(ttl_seconds=60, max_entries=10), None)
+
+
+def test_database_store_waits_for_in_flight_duplicate(db_session):
+    # The store only borrows the session's engine, never its connection
+    run_concurrent_duplicates(DatabaseIdempotencyStore(ttl_seconds=60, lease_seconds=60), TestingAsyncSessionLocal())
+
+
+def test_database_store_takes_over_an_abandoned_claim(db_session):
+    store = DatabaseIdempotencyStore(ttl_seconds=60, lease_seconds=0.2)
+    db = TestingAsyncSessionLocal()
+
+    async def main():
+        # The first owner never completes, as if its worker crashed
+        assert await store.begin("k", db, wait_seconds=0) is None
+        with pytest.raises(HTTPException) as conflict:
+            await store.begin("k", db, wait_seconds=0)
+        assert conflict.value.status_code == 409
+
+        # Once the lease runs out a retry claims the key
+        assert await store.begin("k", db, wait_seconds=1) is None
+        await store.complete("k", StoredResponse(201, {"id": 2}), db)
+
+        # A completed key lives for the full TTL, well past the lease
+        await asyncio.sleep(0.3)
+        return await store.begin("k", db, wait_seconds=0)
+
+    assert asyncio.run(main()) == StoredResponse(201, {"id": 2})
+
+
+def test_memory_store_aborted_key_can_be_reclaimed():
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_entries=10)
+
+    async def main():
+        assert await store.begin("k", None, wait_seconds=1) is None
+        await store.abort("k", None)
+        assert await store.begin("k", None, wait_seconds=1) is None
+
+    asyncio.run(main())
+
+
+def test_memory_store_ttl_and_size_bounds():
+    store = MemoryIdempotencyStore(ttl_seconds=0, max_entries=2)
+
+    async def main():
+        await store.begin("old", None, wait_seconds=1)
+        await store.complete("old", StoredResponse(200, {}), None)
+        # Expired immediately, so the key is claimable again
+        assert await store.begin("old", None, wait_seconds=1) is None
+
+        store.ttl_seconds = 60
+        for key in ("a", "b", "c"):
+            await store.begin(key, None, wait_seconds=1)
+            await store.complete(key, StoredResponse(200, {"key": key}), None)
+        await store.begin("d", None, wait_seconds=1)
+        assert list(store._entries) == ["b", "c", "d"]
+
+    asyncio.run(main())
+
+
+def test_memory_store_times_out_with_conflict():
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_entries=10)
+
+    async def main():
+        await store.begin("k", None, wait_seconds=1)
+        with pytest.raises(HTTPException) as exc:
+            await store.begin("k", None, wait_seconds=0.05)
+        assert exc.value.status_code == 409
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("backend", ["memory", "database"])
+def test_key_reused_with_another_request_is_rejected(db_session, backend):
+    if backend == "memory":
+        store, db = MemoryIdempotencyStore(ttl_seconds=60, max_entries=10), None
+    else:
+        store, db = DatabaseIdempotencyStore(ttl_seconds=60, lease_seconds=60), TestingAsyncSessionLocal()
+
+    async def main():
+        assert await store.begin("k", db, wait_seconds=0, fingerprint="a") is None
+        # Rejected while the first request is in flight and after it completes
+        with pytest.raises(HTTPException) as in_flight:
+            await store.begin("k", db, wait_seconds=0, fingerprint="b")
+        await store.complete("k", StoredResponse(201, {"id": 1}), db)
+        with pytest.raises(HTTPException) as completed:
+            await store.begin("k", db, wait_seconds=0, fingerprint="b")
+        replay = await store.begin("k", db, wait_seconds=0, fingerprint="a")
+        return in_flight.value.status_code, completed.value.status_code, replay
+
+    assert asyncio.run(main()) == (422, 422, StoredResponse(201, {"id": 1}))
@@ -0,0 +1,74 @@
+# tests/test_kitchen.py
+"""
+Kitchen board tests.
+"""
+import asyncio
+
+from app.models import Order, OrderItem, OrderStatus
+from app.utils.kitchen_queue import kitchen_queue
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def load_board():
+    async def main():
+        async with TestingAsyncSessionLocal() as db:
+            await kitchen_queue.load(db)
+
+    asyncio.run(main())
+
+
+def test_board_is_built_at_load_and_updated_incrementally(
+    client, db_session, admin_token, customer_token, sample_menu_item, query_counter
+):
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    db_session.add(Order(
+        order_number="ORD-KITCHEN-OLD",
+        total_amount=sample_menu_item.price,
+        status=OrderStatus.PREPARING,
+        order_items=[OrderItem(menu_item_id=sample_menu_item.id, quantity=1, price=sample_menu_item.price)]
+    ))
+    db_session.add(Order(order_number="ORD-KITCHEN-DONE", total_amount=1, status=OrderStatus.DELIVERED))
+    db_session.commit()
+    load_board()
+
+    order = {"items": [{"menu_item_id": sample_menu_item.id, "quantity": 2}]}
+    customer_order = client.post("/api/orders", json=order, headers={"Authorization": f"Bearer {customer_token}"}).json()
+    guest_order = client.post("/api/orders/guest", json={"table_number": 3, **order}).json()
+
+    query_counter.clear()
+    board = client.get("/api/orders/kitchen", headers=admin).json()
+    # Only the admin's token version check in get_current_user hits the database
+    assert len(query_counter) == 1
+
+    assert board["counts"] == {"pending": 2, "confirmed": 0, "preparing": 1, "ready": 0}
+    pending = board["columns"]["pending"]
+    assert [entry["id"] for entry in pending] == [customer_order["id"], guest_order["id"]]
+    assert pending[1]["items"][0] == {
+        "menu_item_id": sample_menu_item.id,
+        "name": sample_menu_item.name,
+        "quantity": 2,
+        "special_instructions": None
+    }
+
+    client.patch(f"/api/orders/{customer_order['id']}/status", json={"status": "ready"}, headers=admin)
+    client.delete(f"/api/orders/{guest_order['id']}", headers=admin)
+    board = client.get("/api/orders/kitchen", headers=admin).json()
+    assert board["counts"] == {"pending": 0, "confirmed": 0, "preparing": 1, "ready": 1}
+
+    done = db_session.query(Order).filter_by(order_number="ORD-KITCHEN-DONE").one()
+    client.patch(
+        "/api/orders/status",
+        json={"updates": [
+            {"order_id": customer_order["id"], "status": "delivered"},
+            {"order_id": done.id, "status": "confirmed"}
+        ]},
+        headers=admin
+    )
+    board = client.get("/api/orders/kitchen", headers=admin).json()
+    assert board["counts"] == {"pending": 0, "confirmed": 1, "preparing": 1, "ready": 0}
+    assert board["columns"]["confirmed"][0]["order_number"] == "ORD-KITCHEN-DONE"
+
+
+def test_board_requires_admin(client, customer_token):
+    response = client.get("/api/orders/kitchen", headers={"Authorization": f"Bearer {customer_token}"})
+    assert response.status_code == 403
@@ -0,0 +1,101 @@
+# tests/test_menu.py
+"""
+Menu listing and detail tests.
+"""
+from app.models import Category, MenuItem
+from app.websocket import manager
+from tests.test_menu_search import rebuild_index
+
+
+def add_items(db_session, count):
+    categories = [Category(name=f"Category {index}") for index in range(3)]
+    db_session.add_all(categories)
+    db_session.commit()
+    db_session.add_all([
+        MenuItem(name=f"Dish {index}", price=5.0 + index, category_id=categories[index % 3].id)
+        for index in range(count)
+    ])
+    db_session.commit()
+
+
+def test_menu_list_is_one_statement_regardless_of_item_count(client, db_session, sample_menu_item, query_counter):
+    query_counter.clear()
+    single = client.get("/api/menu").json()
+    single_count = len(query_counter)
+
+    add_items(db_session, 60)
+    query_counter.clear()
+    many = client.get("/api/menu").json()
+
+    assert len(single) == 1
+    assert len(many) == 61
+    assert single_count == len(query_counter) == 1
+    assert many[0]["category"]["name"] == "Test Category"
+    assert {item["category"]["name"] for item in many[1:]} == {"Category 0", "Category 1", "Category 2"}
+
+
+def test_menu_list_pages_in_id_order(client, db_session, sample_menu_item):
+    add_items(db_session, 10)
+    first = client.get("/api/menu", params={"limit": 6}).json()
+    second = client.get("/api/menu", params={"skip": 6, "limit": 6}).json()
+    ids = [item["id"] for item in first + second]
+    assert ids == sorted(ids) and len(set(ids)) == 11
+
+
+def test_menu_item_detail_is_one_statement(client, sample_menu_item, query_counter):
+    query_counter.clear()
+    response = client.get(f"/api/menu/{sample_menu_item.id}")
+    assert response.status_code == 200
+    assert response.json()["category"]["name"] == "Test Category"
+    assert len(query_counter) == 1
+
+
+def test_bulk_availability_is_one_update_and_one_broadcast(client, db_session, admin_token, sample_menu_item, query_counter, monkeypatch):
+    add_items(db_session, 3)
+    rebuild_index()
+    ids = [item.id for item in db_session.query(MenuItem).order_by(MenuItem.id)]
+    client.get("/api/menu/snapshot")
+    broadcasts = []
+
+    async def capture(message):
+        broadcasts.append(message)
+
+    monkeypatch.setattr(manager, "broadcast_to_all", capture)
+    query_counter.clear()
+    response = client.patch(
+        "/api/menu/availability",
+        json={"item_ids": [ids[0], ids[2], ids[0]], "is_available": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["item_ids"] == [ids[0], ids[2]]
+    assert len([statement for statement in query_counter if statement.startswith("UPDATE menu_items")]) == 1
+    assert len(broadcasts) == 1
+    assert broadcasts[0]["type"] == "menu_availability_updated"
+    assert (broadcasts[0]["item_ids"], broadcasts[0]["is_available"]) == ([ids[0], ids[2]], False)
+
+    # Caches and the search index see the change without a reload
+    menu = client.get("/api/menu/snapshot").json()
+    sold_out = {item["id"] for category in menu for item in category["items"] if not item["is_available"]}
+    assert sold_out == {ids[0], ids[2]}
+    hits = client.get("/api/menu/search", params={"available": True}).json()["items"]
+    assert {hit["id"] for hit in hits} == {ids[1], ids[3]}
+
+
+def test_bulk_availability_changes_nothing_if_an_item_is_missing(client, db_session, admin_token, sample_menu_item, customer_token):
+    response = client.patch(
+        "/api/menu/availability",
+        json={"item_ids": [sample_menu_item.id, 999], "is_available": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 404
+    assert "999" in response.json()["detail"]
+    db_session.refresh(sample_menu_item)
+    assert sample_menu_item.is_available
+
+    response = client.patch(
+        "/api/menu/availability",
+        json={"item_ids": [sample_menu_item.id], "is_available": False},
+        headers={"Authorization": f"Bearer {customer_token}"}
+    )
+    assert response.status_code == 403
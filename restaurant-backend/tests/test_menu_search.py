@@ -0,0 +1,116 @@
+# tests/test_menu_search.py
+"""
+In-memory menu search tests.
+"""
+import asyncio
+
+import pytest
+
+from app.models import MenuItem
+from app.utils.menu_search import menu_search, within_one_edit
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def rebuild_index():
+    async def main():
+        async with TestingAsyncSessionLocal() as db:
+            await menu_search.rebuild(db)
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def menu(db_session, sample_category):
+    db_session.add_all([
+        MenuItem(name="Margherita Pizza", description="Tomato, mozzarella, basil", price=11.0,
+                 category_id=sample_category.id, is_vegetarian=True, calories=800, preparation_time=12),
+        MenuItem(name="Diavola Pizza", description="Spicy salami and chili", price=13.5,
+                 category_id=sample_category.id, is_spicy=True, calories=950, preparation_time=12),
+        MenuItem(name="Caprese Salad", description="Tomato and mozzarella", price=8.0,
+                 category_id=sample_category.id, is_vegetarian=True, calories=350, preparation_time=5),
+        MenuItem(name="Crème Brûlée", description=None, price=6.5,
+                 category_id=sample_category.id, is_vegetarian=True, preparation_time=3),
+    ])
+    db_session.commit()
+    rebuild_index()
+
+
+def search(client, **params):
+    response = client.get("/api/menu/search", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def names(result):
+    return [item["name"] for item in result["items"]]
+
+
+def test_exact_prefix_and_typo_matches(client, menu):
+    assert names(search(client, q="pizza")) == ["Diavola Pizza", "Margherita Pizza"]
+    assert names(search(client, q="marg")) == ["Margherita Pizza"]
+    assert names(search(client, q="margherta")) == ["Margherita Pizza"]
+    assert names(search(client, q="creme brulee")) == ["Crème Brûlée"]
+    assert names(search(client, q="pizza spicy")) == ["Diavola Pizza"]
+    assert names(search(client, q="sushi")) == []
+
+
+def test_name_matches_rank_above_description_matches(client, menu, db_session, sample_category):
+    db_session.add(MenuItem(name="Garlic Bread", description="Baked pizza dough", price=4.0,
+                            category_id=sample_category.id))
+    db_session.commit()
+    rebuild_index()
+
+    result = search(client, q="pizza")
+    assert names(result) == ["Diavola Pizza", "Margherita Pizza", "Garlic Bread"]
+    assert result["items"][0]["score"] > result["items"][2]["score"]
+
+
+def test_facet_filters_and_counts(client, menu):
+    result = search(client, q="", vegetarian=True, max_preparation_time=10)
+    assert names(result) == ["Caprese Salad", "Crème Brûlée"]
+    assert result["facets"]["total"] == 2
+    assert result["facets"]["price"] == {"min": 6.5, "max": 8.0}
+
+    result = search(client, q="pizza", min_calories=900)
+    assert names(result) == ["Diavola Pizza"]
+
+    facets = search(client, q="pizza")["facets"]
+    assert facets["vegetarian"] == 1 and facets["spicy"] == 1
+    assert facets["calories"] == {"min": 800, "max": 950}
+
+    # Unknown calories never satisfy a calorie range
+    assert "Crème Brûlée" not in names(search(client, max_calories=2000))
+
+
+def test_search_never_queries_the_database(client, menu, query_counter):
+    query_counter.clear()
+    search(client, q="piza", spicy=True)
+    assert query_counter == []
+
+
+def test_index_follows_menu_writes(client, admin_token, menu, sample_category):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    created = client.post("/api/menu", json={
+        "name": "Quattro Formaggi",
+        "description": "Four cheeses",
+        "price": 14.0,
+        "category_id": sample_category.id,
+        "is_vegetarian": True
+    }, headers=headers).json()
+    assert names(search(client, q="formagi")) == ["Quattro Formaggi"]
+
+    client.put(f"/api/menu/{created['id']}", json={"name": "Quattro Stagioni"}, headers=headers)
+    assert names(search(client, q="formaggi")) == []
+    assert names(search(client, q="stagioni")) == ["Quattro Stagioni"]
+
+    client.delete(f"/api/menu/{created['id']}", headers=headers)
+    assert names(search(client, q="quattro")) == []
+
+
+def test_within_one_edit():
+    assert within_one_edit("pizza", "piza")
+    assert within_one_edit("piza", "pizza")
+    assert within_one_edit("pizza", "pizze")
+    assert within_one_edit("pizza", "pziza")
+    assert not within_one_edit("pizza", "pasta")
+    assert not within_one_edit("pizza", "pi")
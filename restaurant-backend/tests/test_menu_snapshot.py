@@ -0,0 +1,94 @@
+# tests/test_menu_snapshot.py
+"""
+Full-menu snapshot and ETag tests.
+"""
+from app.models import Category, MenuItem
+
+
+def test_snapshot_nests_items_under_active_categories(client, db_session, sample_menu_item):
+    hidden = Category(name="Hidden", is_active=False)
+    db_session.add(hidden)
+    db_session.commit()
+    db_session.add(MenuItem(name="Secret", price=5.0, category_id=hidden.id))
+    db_session.commit()
+
+    response = client.get("/api/menu/snapshot")
+    assert response.status_code == 200
+    menu = response.json()
+    assert [category["name"] for category in menu] == ["Test Category"]
+    assert [item["name"] for item in menu[0]["items"]] == ["Test Burger"]
+    assert "category" not in menu[0]["items"][0]
+
+
+def test_steady_state_reads_skip_the_database(client, sample_menu_item, query_counter):
+    first = client.get("/api/menu/snapshot")
+    categories = client.get("/api/menu/categories/all")
+
+    query_counter.clear()
+    again = client.get("/api/menu/snapshot")
+    assert again.content == first.content
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert client.get("/api/menu/categories/all").json() == categories.json()
+    assert query_counter == []
+
+
+def test_unchanged_menu_returns_304(client, sample_menu_item):
+    etag = client.get("/api/menu/snapshot").headers["ETag"]
+
+    response = client.get("/api/menu/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = client.get("/api/menu/snapshot", headers={"If-None-Match": '"stale", ' + etag})
+    assert response.status_code == 304
+
+
+def test_menu_write_changes_the_etag(client, admin_token, sample_menu_item):
+    etag = client.get("/api/menu/snapshot").headers["ETag"]
+
+    client.put(
+        f"/api/menu/{sample_menu_item.id}",
+        json={"price": 14.5},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+
+    response = client.get("/api/menu/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["items"][0]["price"] == 14.5
+
+
+def test_category_summaries_count_items_in_one_group_by(client, admin_token, db_session, sample_menu_item, query_counter):
+    empty = Category(name="Empty")
+    hidden = Category(name="Hidden", is_active=False)
+    db_session.add_all([empty, hidden])
+    db_session.commit()
+    db_session.add_all([
+        MenuItem(name="Salad", price=7.0, is_vegetarian=True, category_id=sample_menu_item.category_id),
+        MenuItem(name="Soup", price=4.5, is_vegetarian=True, is_available=False, category_id=sample_menu_item.category_id),
+        MenuItem(name="Secret", price=50.0, category_id=hidden.id),
+    ])
+    db_session.commit()
+
+    query_counter.clear()
+    summaries = client.get("/api/menu/categories/summary").json()
+    assert len([statement for statement in query_counter if "GROUP BY" in statement]) == 1
+    assert [summary["name"] for summary in summaries] == ["Test Category", "Empty"]
+    counts = {summary["name"]: summary for summary in summaries}
+    assert (counts["Test Category"]["total_items"], counts["Test Category"]["available_items"]) == (3, 2)
+    assert counts["Test Category"]["vegetarian_items"] == 2
+    assert (counts["Test Category"]["min_price"], counts["Test Category"]["max_price"]) == (4.5, 12.99)
+    assert counts["Empty"]["total_items"] == 0 and counts["Empty"]["min_price"] is None
+
+    query_counter.clear()
+    assert client.get("/api/menu/categories/summary").json() == summaries
+    assert query_counter == []
+
+    client.put(
+        f"/api/menu/{sample_menu_item.id}",
+        json={"is_available": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    summaries = client.get("/api/menu/categories/summary").json()
+    assert summaries[0]["available_items"] == 1
@@ -0,0 +1,165 @@
+"""
+Bulk menu import/export tests.
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from app.config import settings
+from app.models import Category, MenuItem
+from app.utils.menu_transfer import MenuTransfer, csv_records
+from app.schemas import CategoryImportRow, MenuItemImportRow
+
+ITEMS_CSV = """name,category,description,price,is_vegetarian,calories
+Margherita,Pizza,"Tomato, mozzarella
+and basil",9.5,true,800
+Pepperoni,Pizza,,11,false,
+Broken,Pizza,,-3,,
+Ghost,Nowhere,,4,,
+"""
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def import_body(client, token, kind, body, fmt="csv"):
+    response = client.post(
+        f"/api/menu/import/{kind}",
+        params={"format": fmt},
+        content=body.encode() if isinstance(body, str) else body,
+        headers=auth(token)
+    )
+    return response
+
+
+def test_csv_import_upserts_valid_rows_and_reports_the_rest(client, db_session, admin_token):
+    report = import_body(client, admin_token, "categories", "name,description\nPizza,Stone baked\nSalads,\n").json()
+    assert report == {"rows": 2, "created": 2, "updated": 0, "failed": 0, "errors": []}
+
+    report = import_body(client, admin_token, "items", ITEMS_CSV).json()
+    assert (report["rows"], report["created"], report["updated"], report["failed"]) == (4, 2, 0, 2)
+    assert [error["line"] for error in report["errors"]] == [5, 6]
+    assert "price" in report["errors"][0]["error"]
+    assert report["errors"][1]["error"] == "Unknown category 'Nowhere'"
+
+    items = {item.name: item for item in db_session.query(MenuItem).all()}
+    assert set(items) == {"Margherita", "Pepperoni"}
+    assert items["Margherita"].description == "Tomato, mozzarella\nand basil"
+    assert items["Margherita"].is_vegetarian and items["Margherita"].calories == 800
+    assert items["Pepperoni"].is_available and items["Pepperoni"].calories is None
+
+    # Imported items are searchable and on the menu straight away
+    hits = client.get("/api/menu/search", params={"q": "mozarella"}).json()["items"]
+    assert [hit["name"] for hit in hits] == ["Margherita"]
+    menu = client.get("/api/menu/snapshot").json()
+    assert {item["name"] for category in menu for item in category["items"]} == {"Margherita", "Pepperoni"}
+
+
+def test_import_updates_matching_rows_and_keeps_missing_fields(client, db_session, admin_token, sample_menu_item):
+    body = "\n".join([
+        json.dumps({"name": "Test Burger", "category": "Test Category", "price": 14}),
+        json.dumps({"name": "Fries", "category": "Test Category", "price": 3, "is_vegetarian": True}),
+        "",
+        json.dumps({"name": "Fries", "category": "Test Category", "price": 3.5}),
+        "not json",
+        json.dumps({"name": "Soda", "category": "Test Category", "price": 2, "colour": "red"}),
+    ])
+    report = import_body(client, admin_token, "items", body, fmt="ndjson").json()
+    assert (report["rows"], report["created"], report["updated"], report["failed"]) == (5, 1, 2, 2)
+    assert [error["line"] for error in report["errors"]] == [5, 6]
+    assert report["errors"][1]["error"] == "Unknown column(s): colour"
+
+    db_session.expire_all()
+    items = {item.name: item for item in db_session.query(MenuItem).all()}
+    assert len(items) == 2
+    burger = items["Test Burger"]
+    assert burger.id == sample_menu_item.id and burger.price == 14
+    assert burger.description == "Delicious test burger" and burger.preparation_time == 15
+    # The second Fries row updated the first rather than adding a duplicate
+    assert items["Fries"].price == 3.5 and items["Fries"].is_vegetarian
+
+
+def test_import_runs_a_few_statements_per_batch(client, db_session, admin_token, sample_category, query_counter, monkeypatch):
+    monkeypatch.setattr(settings, "MENU_TRANSFER_BATCH_SIZE", 10)
+    rows = "".join(f"Dish {index},Test Category,{5 + index}\n" for index in range(25))
+    query_counter.clear()
+    report = import_body(client, admin_token, "items", "name,category,price\n" + rows).json()
+    assert report["created"] == 25
+    writes = [statement for statement in query_counter if statement.startswith(("INSERT", "UPDATE"))]
+    assert len(writes) == 3
+    # Re-importing the same rows updates them in place
+    report = import_body(client, admin_token, "items", "name,category,price\n" + rows).json()
+    assert (report["created"], report["updated"]) == (0, 25)
+    assert db_session.query(MenuItem).count() == 25
+
+
+def test_import_rejects_bad_uploads_without_writing(client, db_session, admin_token, customer_token):
+    response = import_body(client, admin_token, "categories", "name,colour\nPizza,red\n")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown column(s): colour"
+    response = import_body(client, admin_token, "items", "name,price\nPizza,3\n")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing column(s): category"
+    response = import_body(client, admin_token, "categories", b"name\nPizza\n\xff\n")
+    assert response.status_code == 400
+    assert import_body(client, customer_token, "categories", "name\nPizza\n").status_code == 403
+    assert db_session.query(Category).count() == 0
+
+
+def test_export_round_trips_through_import(client, db_session, admin_token, sample_menu_item, monkeypatch):
+    monkeypatch.setattr(settings, "MENU_TRANSFER_BATCH_SIZE", 2)
+    db_session.add_all([
+        MenuItem(name=f"Dish {index}", description='Say "hi",\nthen eat', price=5.0, category_id=sample_menu_item.category_id)
+        for index in range(4)
+    ])
+    db_session.commit()
+
+    response = client.get("/api/menu/export/items", headers=auth(admin_token))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Test Burger"] + [f"Dish {index}" for index in range(4)]
+    assert rows[0]["category"] == "Test Category" and rows[0]["is_available"] == "true"
+    assert rows[1]["description"] == 'Say "hi",\nthen eat'
+
+    report = import_body(client, admin_token, "items", response.text).json()
+    assert (report["created"], report["updated"], report["failed"]) == (0, 5, 0)
+
+    response = client.get("/api/menu/export/categories", params={"format": "ndjson"}, headers=auth(admin_token))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"name": "Test Category", "description": "Test Description", "image_url": None, "is_active": True}]
+    assert client.get("/api/menu/export/items").status_code == 401
+
+
+def test_csv_records_handle_chunks_split_anywhere():
+    text = 'name,category,price\n"Crème, brûlée",Desserts,6\n\n"Two\nlines",Desserts,"7"\nShort,Desserts\n'
+    data = text.encode()
+
+    async def chunks(size):
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    async def collect(size):
+        return [record async for record in csv_records(chunks(size), MenuItemImportRow)]
+
+    expected = asyncio.run(collect(len(data)))
+    assert expected == [
+        (2, {"name": "Crème, brûlée", "category": "Desserts", "price": "6"}, None),
+        (4, {"name": "Two\nlines", "category": "Desserts", "price": "7"}, None),
+        (6, None, "Expected 3 fields, got 2"),
+    ]
+    for size in (1, 2, 3, 7):
+        assert asyncio.run(collect(size)) == expected
+
+
+def test_transfers_must_define_their_upsert_key():
+    class Incomplete(MenuTransfer):
+        model = Category
+        row_model = CategoryImportRow
+
+    with pytest.raises(TypeError):
+        Incomplete(None, 10)
@@ -0,0 +1,156 @@
+# tests/test_order_events.py
+"""
+Server-Sent Events order tracking tests.
+"""
+import asyncio
+import json
+
+from app.models import Order, OrderStatus
+from app.routers import orders
+from app.routers.orders import order_event_stream
+from app.websocket import ConnectionManager, manager
+
+
+def parse(message):
+    """Split an SSE message into its fields."""
+    fields = {}
+    for line in message.strip().split("\n"):
+        key, _, value = line.partition(": ")
+        fields[key] = value
+    return fields
+
+
+async def never_disconnected():
+    return False
+
+
+def status_update(order_id, new_status):
+    return {"type": "order_status_updated", "order": {"id": order_id, "status": new_status}}
+
+
+def test_stream_sends_snapshot_updates_and_ends_when_finished():
+    snapshot = {"id": 501, "status": "pending"}
+
+    async def main():
+        stream = order_event_stream(501, snapshot, None, never_disconnected, heartbeat_seconds=0.05)
+        messages = [await stream.__anext__()]
+        messages.append(await stream.__anext__())  # idle heartbeat
+        await manager.broadcast_order_update(501, status_update(501, "ready"))
+        messages.append(await stream.__anext__())
+        await manager.broadcast_order_updates([{"id": 501, "status": "delivered"}])
+        messages.append(await stream.__anext__())
+        rest = [message async for message in stream]
+        return messages, rest
+
+    messages, rest = asyncio.run(main())
+
+    assert parse(messages[0])["event"] == "snapshot"
+    assert messages[1] == ": heartbeat\n\n"
+    ready, delivered = parse(messages[2]), parse(messages[3])
+    assert json.loads(ready["data"])["order"]["status"] == "ready"
+    assert json.loads(delivered["data"])["order"]["status"] == "delivered"
+    assert int(delivered["id"]) > int(ready["id"])
+    assert rest == []
+    assert 501 not in manager.order_listeners
+
+
+def test_stream_resumes_after_last_event_id():
+    async def main():
+        await manager.broadcast_order_update(502, status_update(502, "confirmed"))
+        await manager.broadcast_order_update(502, status_update(502, "preparing"))
+        first_id = manager.events_since(502, 0)[0][0]
+        stream = order_event_stream(502, None, first_id, never_disconnected, heartbeat_seconds=1)
+        replayed = await stream.__anext__()
+        await stream.aclose()
+        return replayed
+
+    replayed = parse(asyncio.run(main()))
+    assert json.loads(replayed["data"])["order"]["status"] == "preparing"
+
+
+def collect(stream_args):
+    async def main():
+        return [message async for message in order_event_stream(*stream_args, never_disconnected, heartbeat_seconds=1)]
+
+    return asyncio.run(main())
+
+
+def test_resumed_stream_of_a_finished_order_ends_after_replay(monkeypatch):
+    log = ConnectionManager()
+    monkeypatch.setattr(orders, "manager", log)
+
+    async def main():
+        await log.broadcast_order_update(503, status_update(503, "ready"))
+        await log.broadcast_order_update(503, status_update(503, "delivered"))
+
+    asyncio.run(main())
+    first_id = log.events_since(503, 0)[0][0]
+
+    replayed = collect((503, {"id": 503, "status": "delivered"}, first_id))
+    assert [json.loads(parse(message)["data"])["order"]["status"] for message in replayed] == ["delivered"]
+    # Already up to date: the snapshot closes the stream instead of heartbeats
+    caught_up = collect((503, {"id": 503, "status": "delivered"}, log.last_event_id))
+    assert [parse(message)["event"] for message in caught_up] == ["snapshot"]
+
+
+def test_resume_past_evicted_events_sends_a_snapshot(monkeypatch):
+    log = ConnectionManager()
+    log.max_events_per_order = 3
+    log.max_logged_orders = 1
+    monkeypatch.setattr(orders, "manager", log)
+    snapshot = {"id": 504, "status": "delivered"}
+
+    async def main():
+        for step in range(5):
+            await log.broadcast_order_update(504, status_update(504, f"step-{step}"))
+        truncated = log.events_since(504, 1)
+        await log.broadcast_order_update(505, status_update(505, "ready"))
+        return truncated
+
+    # Order 504 dropped its oldest events, then its whole log was evicted
+    assert asyncio.run(main()) is None
+    assert log.events_since(504, 1) is None
+    assert log.events_since(504, log.evicted_through) == []
+    assert log.events_since(505, 0) is not None
+
+    messages = collect((504, snapshot, 1))
+    assert [parse(message)["event"] for message in messages] == ["snapshot"]
+
+
+def test_stream_endpoint(client, db_session):
+    db_session.add(Order(order_number="ORD-SSE-1", total_amount=10, status=OrderStatus.DELIVERED))
+    db_session.commit()
+
+    with client.stream("GET", "/api/orders/track/ORD-SSE-1/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.read().decode()
+
+    snapshot = parse(body)
+    assert snapshot["event"] == "snapshot"
+    assert json.loads(snapshot["data"])["status"] == "delivered"
+
+    assert client.get("/api/orders/track/ORD-MISSING/events").status_code == 404
+
+
+def test_stream_replays_events_published_while_the_snapshot_loads(client, db_session, monkeypatch):
+    db_session.add(Order(order_number="ORD-SSE-2", total_amount=10, status=OrderStatus.PENDING))
+    db_session.commit()
+    log = ConnectionManager()
+    monkeypatch.setattr(orders, "manager", log)
+    load = orders.load_tracking_payload_or_primary
+
+    async def load_then_deliver(order_number, db, primary_db):
+        snapshot = await load(order_number, db, primary_db)
+        # Lands before the stream starts listening
+        log.publish_order_event(snapshot["id"], status_update(snapshot["id"], "delivered"))
+        return snapshot
+
+    monkeypatch.setattr(orders, "load_tracking_payload_or_primary", load_then_deliver)
+
+    with client.stream("GET", "/api/orders/track/ORD-SSE-2/events") as response:
+        messages = [parse(message) for message in response.read().decode().strip().split("\n\n")]
+
+    assert [message["event"] for message in messages] == ["snapshot", "order_status_updated"]
+    assert json.loads(messages[0]["data"])["status"] == "pending"
+    assert json.loads(messages[1]["data"])["order"]["status"] == "delivered"
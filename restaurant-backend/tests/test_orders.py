@@ -0,0 +1,426 @@
+# tests/test_orders.py
+"""
+Order endpoint tests.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects.postgresql import psycopg
+
+from app.models import MenuItem, Order, OrderItem, OrderStatus
+from app.routers.orders import bulk_status_statement
+from app.utils.order_number import OrderNumberGenerator
+from app.websocket import manager
+from tests.conftest import async_engine
+
+
+def create_orders(db_session, customer, menu_item, count, lines_per_order=3):
+    """Insert `count` orders for `customer`, each with several lines."""
+    orders = []
+    start = db_session.query(Order).count()
+    for index in range(start, start + count):
+        order = Order(
+            order_number=f"ORD-TEST-{customer.id}-{index:04d}",
+            customer_id=customer.id,
+            table_number="5",
+            total_amount=menu_item.price * lines_per_order,
+            status=OrderStatus.PENDING
+        )
+        order.order_items = [
+            OrderItem(menu_item_id=menu_item.id, quantity=1, price=menu_item.price)
+            for _ in range(lines_per_order)
+        ]
+        db_session.add(order)
+        orders.append(order)
+    db_session.commit()
+    return orders
+
+
+def count_queries(client, query_counter, url, headers=None):
+    """Return how many statements a GET request issues."""
+    query_counter.clear()
+    response = client.get(url, headers=headers or {})
+    assert response.status_code == 200
+    return len(query_counter), response.json()
+
+
+def test_my_orders_query_count_is_constant(
+    client, db_session, customer_user, customer_token, sample_menu_item, query_counter
+):
+    headers = {"Authorization": f"Bearer {customer_token}"}
+    client.get("/api/auth/me", headers=headers)  # warm the user cache
+
+    create_orders(db_session, customer_user, sample_menu_item, 1)
+    single_count, single = count_queries(client, query_counter, "/api/orders/my-orders", headers)
+
+    create_orders(db_session, customer_user, sample_menu_item, 40)
+    many_count, many = count_queries(client, query_counter, "/api/orders/my-orders", headers)
+
+    assert len(single) == 1
+    assert len(many) == 41
+    assert many_count == single_count
+    assert many[0]["items"][0] == {
+        "menu_item_id": sample_menu_item.id,
+        "name": sample_menu_item.name,
+        "quantity": 1,
+        "price": sample_menu_item.price
+    }
+
+
+def test_track_order_query_count_is_constant(
+    client, db_session, customer_user, sample_menu_item, query_counter
+):
+    small, = create_orders(db_session, customer_user, sample_menu_item, 1, lines_per_order=1)
+    small_number = small.order_number
+    large = Order(
+        order_number="ORD-TEST-LARGE",
+        table_number="7",
+        guest_name="Table 7",
+        total_amount=sample_menu_item.price * 25,
+        status=OrderStatus.PENDING,
+        order_items=[
+            OrderItem(menu_item_id=sample_menu_item.id, quantity=1, price=sample_menu_item.price)
+            for _ in range(25)
+        ]
+    )
+    db_session.add(large)
+    db_session.commit()
+
+    small_count, small_body = count_queries(client, query_counter, f"/api/orders/track/{small_number}")
+    large_count, large_body = count_queries(client, query_counter, "/api/orders/track/ORD-TEST-LARGE")
+
+    assert len(small_body["items"]) == 1
+    assert len(large_body["items"]) == 25
+    assert large_body["guest_name"] == "Table 7"
+    assert large_count == small_count == 1
+
+
+def test_track_order_not_found(client, db_session):
+    response = client.get("/api/orders/track/ORD-MISSING")
+    assert response.status_code == 404
+
+
+def test_get_orders_keyset_pagination(client, db_session, admin_token, customer_user, sample_menu_item):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    create_orders(db_session, customer_user, sample_menu_item, 7, lines_per_order=1)
+
+    seen = []
+    cursor = None
+    for _ in range(5):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/orders", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(order["id"] for order in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    else:
+        raise AssertionError("pagination did not terminate")
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_get_orders_rejects_invalid_cursor(client, admin_token):
+    response = client.get(
+        "/api/orders",
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 400
+
+
+def test_get_orders_legacy_skip(client, db_session, admin_token, customer_user, sample_menu_item):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    create_orders(db_session, customer_user, sample_menu_item, 4, lines_per_order=1)
+
+    first = client.get("/api/orders", params={"limit": 2}, headers=headers).json()
+    skipped = client.get("/api/orders", params={"skip": 2, "limit": 2}, headers=headers).json()
+    assert [order["id"] for order in first + skipped] == sorted(
+        (order["id"] for order in first + skipped), reverse=True
+    )
+
+    both = client.get(
+        "/api/orders",
+        params={"skip": 2, "cursor": response_cursor(client, headers)},
+        headers=headers
+    )
+    assert both.status_code == 400
+
+
+def response_cursor(client, headers):
+    """Fetch the cursor for the second page of order history."""
+    return client.get("/api/orders", params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+
+
+def test_create_order_missing_item_returns_404(client, customer_token, sample_menu_item):
+    response = client.post(
+        "/api/orders",
+        json={"items": [
+            {"menu_item_id": sample_menu_item.id, "quantity": 1},
+            {"menu_item_id": 9999, "quantity": 1}
+        ]},
+        headers={"Authorization": f"Bearer {customer_token}"}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Menu item with ID 9999 not found"
+
+
+def test_create_order_unavailable_item_returns_400(client, db_session, customer_token, sample_menu_item):
+    sample_menu_item.is_available = False
+    db_session.commit()
+
+    response = client.post(
+        "/api/orders",
+        json={"items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]},
+        headers={"Authorization": f"Bearer {customer_token}"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Menu item '{sample_menu_item.name}' is not available"
+
+
+def test_create_order_duplicate_lines(client, customer_token, sample_menu_item):
+    response = client.post(
+        "/api/orders",
+        json={"items": [
+            {"menu_item_id": sample_menu_item.id, "quantity": 2},
+            {"menu_item_id": sample_menu_item.id, "quantity": 1, "special_instructions": "no onions"}
+        ]},
+        headers={"Authorization": f"Bearer {customer_token}"}
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert len(body["order_items"]) == 2
+    assert body["total_amount"] == round(sample_menu_item.price * 3, 2)
+    assert sorted(line["quantity"] for line in body["order_items"]) == [1, 2]
+
+
+def test_create_order_statement_count_is_constant(
+    client, db_session, customer_token, sample_category, query_counter
+):
+    headers = {"Authorization": f"Bearer {customer_token}"}
+    items = [
+        MenuItem(name=f"Dish {index}", price=5.0 + index, category_id=sample_category.id, is_available=True)
+        for index in range(15)
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    item_ids = [item.id for item in items]
+    client.get("/api/auth/me", headers=headers)  # warm the user cache
+
+    def statements_for(lines):
+        query_counter.clear()
+        response = client.post(
+            "/api/orders",
+            json={"items": [{"menu_item_id": item_id, "quantity": 1} for item_id in lines]},
+            headers=headers
+        )
+        assert response.status_code == 201
+        assert len(response.json()["order_items"]) == len(lines)
+        return len(query_counter)
+
+    assert statements_for(item_ids) == statements_for(item_ids[:1])
+
+
+def test_order_numbers_unique_across_workers(db_session, query_counter):
+    worker_a = OrderNumberGenerator(block_size=10)
+    worker_b = OrderNumberGenerator(block_size=10)
+
+    async def main():
+        numbers_a = [await worker_a.next(async_engine) for _ in range(25)]
+        numbers_b = [await worker_b.next(async_engine) for _ in range(25)]
+        return numbers_a, numbers_b
+
+    numbers_a, numbers_b = asyncio.run(main())
+
+    assert len(set(numbers_a + numbers_b)) == 50
+    assert numbers_a == sorted(numbers_a)
+    assert all(number.startswith("ORD-") for number in numbers_a)
+
+    # Three blocks each; no statement per number
+    claims = [statement for statement in query_counter if "order_number_blocks" in statement]
+    assert len(claims) <= 7
+
+
+def test_guest_order_is_priced_server_side(client, db_session, sample_menu_item):
+    response = client.post("/api/orders/guest", json={
+        "table_number": 4,
+        "guest_name": "Table 4",
+        "items": [{"menu_item_id": sample_menu_item.id, "quantity": 2, "price": 0.01}],
+        "total_amount": 0.02,
+        "status": "pending",
+        "order_type": "dine_in"
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["table_number"] == "4"
+    assert body["status"] == "pending"
+    assert body["total_amount"] == round(sample_menu_item.price * 2, 2)
+
+    line = db_session.query(OrderItem).one()
+    assert line.price == sample_menu_item.price
+
+
+def test_guest_order_rejects_unknown_and_empty(client, sample_menu_item):
+    missing = client.post("/api/orders/guest", json={"items": [{"menu_item_id": 9999, "quantity": 1}]})
+    assert missing.status_code == 404
+
+    empty = client.post("/api/orders/guest", json={"items": []})
+    assert empty.status_code == 422
+
+
+def test_guest_order_sees_menu_price_change(client, admin_token, sample_menu_item):
+    order = {"items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]}
+    assert client.post("/api/orders/guest", json=order).json()["total_amount"] == sample_menu_item.price
+
+    client.put(
+        f"/api/menu/{sample_menu_item.id}",
+        json={"price": 20.0},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert client.post("/api/orders/guest", json=order).json()["total_amount"] == 20.0
+
+    client.put(
+        f"/api/menu/{sample_menu_item.id}",
+        json={"is_available": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert client.post("/api/orders/guest", json=order).status_code == 400
+
+
+def test_create_order_idempotent_replay(client, db_session, customer_token, sample_menu_item, query_counter):
+    headers = {"Authorization": f"Bearer {customer_token}", "Idempotency-Key": "cart-42"}
+    order = {"items": [{"menu_item_id": sample_menu_item.id, "quantity": 2}]}
+
+    first = client.post("/api/orders", json=order, headers=headers)
+    query_counter.clear()
+    retry = client.post("/api/orders", json=order, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db_session.query(Order).count() == 1
+    assert not [s for s in query_counter if "menu_items" in s or "order_items" in s]
+
+    other = client.post("/api/orders", json=order, headers={**headers, "Idempotency-Key": "cart-43"})
+    assert other.json()["order_number"] != first.json()["order_number"]
+
+
+def test_guest_order_idempotent_replay_and_failed_attempt(client, db_session, sample_menu_item):
+    headers = {"Idempotency-Key": "table-4-submit"}
+    bad = client.post("/api/orders/guest", json={"items": [{"menu_item_id": 9999, "quantity": 1}]}, headers=headers)
+    assert bad.status_code == 404
+
+    # A failed attempt is not stored, so the corrected retry goes through
+    order = {"table_number": 4, "items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]}
+    first = client.post("/api/orders/guest", json=order, headers=headers)
+    retry = client.post("/api/orders/guest", json=order, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert db_session.query(Order).count() == 1
+
+
+def test_guest_idempotency_keys_are_scoped_and_bound_to_the_order(client, db_session, sample_menu_item):
+    headers = {"Idempotency-Key": "submit-1"}
+    order = {"table_number": 4, "items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]}
+    first = client.post("/api/orders/guest", json=order, headers=headers)
+
+    # Another table reusing the key gets its own order, not table 4's
+    elsewhere = client.post("/api/orders/guest", json={**order, "table_number": 9}, headers=headers)
+    assert elsewhere.status_code == 200
+    assert elsewhere.json()["order_number"] != first.json()["order_number"]
+    assert "Idempotent-Replayed" not in elsewhere.headers
+
+    changed = client.post("/api/orders/guest", json={**order, "guest_name": "Eve"}, headers=headers)
+    assert changed.status_code == 422
+    assert db_session.query(Order).count() == 2
+
+
+def test_bulk_status_update_single_statement(
+    client, db_session, admin_token, customer_user, sample_menu_item, query_counter, monkeypatch
+):
+    orders = create_orders(db_session, customer_user, sample_menu_item, 3, lines_per_order=1)
+    ids = [order.id for order in orders]
+    broadcasts = []
+
+    async def record(changes, message_type="orders_status_updated"):
+        broadcasts.append(changes)
+
+    monkeypatch.setattr(manager, "broadcast_order_updates", record)
+    query_counter.clear()
+    response = client.patch(
+        "/api/orders/status",
+        json={"updates": [
+            {"order_id": ids[0], "status": "ready"},
+            {"order_id": ids[1], "status": "ready"},
+            {"order_id": ids[2], "status": "preparing"}
+        ]},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+
+    assert response.status_code == 200
+    assert {change["id"]: change["status"] for change in response.json()} == {
+        ids[0]: "ready", ids[1]: "ready", ids[2]: "preparing"
+    }
+    assert len([s for s in query_counter if s.lstrip().upper().startswith("UPDATE ORDERS")]) == 1
+    assert len(broadcasts) == 1 and len(broadcasts[0]) == 3
+
+    db_session.expire_all()
+    assert [order.status for order in db_session.query(Order).order_by(Order.id)] == [
+        OrderStatus.READY, OrderStatus.READY, OrderStatus.PREPARING
+    ]
+
+
+
+def test_bulk_status_update_casts_statuses_for_postgres():
+    statement = bulk_status_statement(
+        {1: OrderStatus.READY, 2: OrderStatus.PREPARING}, datetime.now(timezone.utc)
+    )
+    sql = str(statement.compile(dialect=psycopg.dialect()))
+    assert sql.count("AS orderstatus)") == 2
+
+def test_bulk_status_update_is_all_or_nothing(client, db_session, admin_token, customer_user, sample_menu_item):
+    order, = create_orders(db_session, customer_user, sample_menu_item, 1, lines_per_order=1)
+    response = client.patch(
+        "/api/orders/status",
+        json={"updates": [{"order_id": order.id, "status": "ready"}, {"order_id": 9999, "status": "ready"}]},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 404
+    db_session.expire_all()
+    assert db_session.get(Order, order.id).status == OrderStatus.PENDING
+
+
+def test_track_order_cache_hit_and_invalidation(
+    client, db_session, admin_token, customer_user, sample_menu_item, query_counter
+):
+    order, = create_orders(db_session, customer_user, sample_menu_item, 1, lines_per_order=2)
+    url = f"/api/orders/track/{order.order_number}"
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    before = client.get("/api/orders/track-cache/stats", headers=headers).json()
+
+    assert client.get(url).json()["status"] == "pending"
+    query_counter.clear()
+    assert client.get(url).json()["status"] == "pending"
+    assert query_counter == []
+
+    client.patch(f"/api/orders/{order.id}/status", json={"status": "preparing"}, headers=headers)
+    assert client.get(url).json()["status"] == "preparing"
+
+    client.patch("/api/orders/status", json={"updates": [{"order_id": order.id, "status": "ready"}]}, headers=headers)
+    assert client.get(url).json()["status"] == "ready"
+
+    stats = client.get("/api/orders/track-cache/stats", headers=headers).json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 3
+
+
+def test_track_order_cancel_invalidates(client, db_session, customer_token, customer_user, sample_menu_item):
+    order, = create_orders(db_session, customer_user, sample_menu_item, 1, lines_per_order=1)
+    url = f"/api/orders/track/{order.order_number}"
+
+    assert client.get(url).json()["status"] == "pending"
+    client.delete(f"/api/orders/{order.id}", headers={"Authorization": f"Bearer {customer_token}"})
+    assert client.get(url).json()["status"] == "cancelled"
@@ -0,0 +1,65 @@
+# tests/test_password_hashing.py
+"""
+Password hashing pool tests.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.password_hashing import PasswordHasher
+
+
+def test_hash_and_verify_run_on_the_pool():
+    hasher = PasswordHasher(workers=1, max_queue=4)
+
+    async def main():
+        hashed = await hasher.hash("secret123")
+        return await hasher.verify("secret123", hashed), await hasher.verify("wrong", hashed)
+
+    assert asyncio.run(main()) == (True, False)
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["queued"] == stats["running"] == 0
+    hasher.shutdown()
+
+
+def test_full_queue_rejects_and_cancelled_calls_free_their_slot():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(hasher._run(release.wait))
+        while hasher.stats()["running"] == 0:
+            await asyncio.sleep(0.01)
+        waiting = asyncio.ensure_future(hasher._run(lambda: True))
+        await asyncio.sleep(0)
+        assert hasher.stats()["queued"] == 1
+
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher._run(lambda: True)
+        assert exc_info.value.status_code == 503
+
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        assert hasher.stats()["queued"] == 0
+
+        release.set()
+        await running
+
+    asyncio.run(main())
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["peak_queued"] == 1
+    hasher.shutdown()
+
+
+def test_hash_pool_stats_are_admin_only(client, admin_token, customer_token):
+    response = client.get("/api/auth/hash-pool", headers={"Authorization": f"Bearer {customer_token}"})
+    assert response.status_code == 403
+
+    response = client.get("/api/auth/hash-pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    # Both logins verified their password on the pool
+    assert response.json()["completed"] >= 2
@@ -0,0 +1,55 @@
+# tests/test_pool_metrics.py
+"""
+Connection pool metrics tests.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.database import metered_pool_class, pool_stats
+from tests.conftest import async_engine as test_async_engine
+
+
+def test_metered_pool_reports_occupancy_and_timeouts():
+    engine = create_async_engine(
+        test_async_engine.url,
+        poolclass=metered_pool_class(AsyncAdaptedQueuePool),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    async def main():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            busy = pool_stats(engine)
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        idle = pool_stats(engine)
+        await engine.dispose()
+        return busy, idle
+
+    busy, idle = asyncio.run(main())
+
+    assert busy["metered"] is True
+    assert busy["pool_size"] == 1 and busy["max_overflow"] == 0
+    assert busy["checked_out"] == 1 and busy["checkouts"] == 1
+    assert idle["checked_out"] == 0 and idle["checked_in"] == 1
+    assert idle["timeouts"] == 1
+    # The timed-out attempt waited out the full pool timeout
+    assert idle["wait_max_ms"] >= 50
+    assert idle["checkout_max_ms"] > 0
+
+
+def test_db_pool_endpoint_requires_admin(client, admin_token, customer_token):
+    response = client.get("/api/restaurant/db-pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert "metered" in response.json()
+
+    response = client.get("/api/restaurant/db-pool", headers={"Authorization": f"Bearer {customer_token}"})
+    assert response.status_code == 403
@@ -0,0 +1,74 @@
+# tests/test_rate_limit.py
+"""
+Login throttling tests.
+"""
+import asyncio
+
+import pytest
+
+from app.utils.password_hashing import password_hasher
+from app.utils.rate_limit import DatabaseRateLimitStore, MemoryRateLimitStore, login_throttle
+from tests.conftest import TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def tight_limits(monkeypatch):
+    monkeypatch.setattr(login_throttle, "per_account", 3)
+    monkeypatch.setattr(login_throttle, "per_ip", 5)
+
+
+def attempt(client, email, password="wrong-password"):
+    return client.post("/api/auth/login", json={"email": email, "password": password})
+
+
+def test_account_limit_rejects_before_lookup_or_hash(client, customer_user, tight_limits, query_counter):
+    for _ in range(3):
+        assert attempt(client, "customer@test.com").status_code == 401
+
+    hashed_before = password_hasher.stats()["completed"]
+    query_counter.clear()
+    response = attempt(client, "customer@test.com", "customer123")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert query_counter == []
+    assert password_hasher.stats()["completed"] == hashed_before
+
+    # Other accounts from the same IP are still allowed, up to the IP limit
+    # (the throttled attempt counted against the IP too)
+    assert attempt(client, "someone@test.com").status_code == 401
+    assert attempt(client, "else@test.com").status_code == 429
+
+
+def test_unknown_email_still_costs_a_hash(client, db_session):
+    hashed_before = password_hasher.stats()["completed"]
+    assert attempt(client, "nobody@test.com").status_code == 401
+    assert password_hasher.stats()["completed"] == hashed_before + 1
+
+
+SLIDING_HITS = [
+    (1000, True), (1010, True), (1020, True), (1030, True),
+    (1040, False),
+    # Next window: the previous 4 hits still weigh 4 * 0.9
+    (1110, False),
+    # Half-way through, they weigh 2, leaving room for 2 more
+    (1150, True), (1160, True), (1170, False),
+]
+
+
+def run_sliding_hits(store):
+    """Send SLIDING_HITS for one key with limit 4 in a 100 s window."""
+    async def main():
+        async with TestingAsyncSessionLocal() as db:
+            for now, allowed in SLIDING_HITS:
+                wait = await store.hit("k", 4, 100, db, now=now)
+                assert (wait == 0) == allowed, now
+
+    asyncio.run(main())
+
+
+def test_memory_store_slides_the_window():
+    run_sliding_hits(MemoryRateLimitStore())
+
+
+def test_database_store_slides_the_window(db_session):
+    run_sliding_hits(DatabaseRateLimitStore())
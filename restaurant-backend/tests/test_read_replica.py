@@ -0,0 +1,148 @@
+# tests/test_read_replica.py
+"""
+Read-replica routing tests.
+"""
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.utils import read_replica
+from app.utils.order_cache import TrackingCache
+from app.utils.read_replica import STICKY_COOKIE, STICKY_HEADER, ReplicaRouter
+from tests.conftest import async_engine
+
+
+class FakeLagRouter(ReplicaRouter):
+    """Router whose measured lag is set by the test."""
+    reported_lag = 0.0
+
+    async def measure_lag(self):
+        return self.reported_lag
+
+
+def use_replica(monkeypatch, engine):
+    router = FakeLagRouter(
+        engine,
+        async_sessionmaker(engine, autoflush=False, expire_on_commit=False),
+        max_lag_seconds=2,
+        check_interval=0
+    )
+    monkeypatch.setattr(read_replica, "replica_router", router)
+    return router
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Route reads to a second engine on the test database; yields its statements."""
+    engine = create_async_engine(async_engine.url, poolclass=NullPool)
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    yield use_replica(monkeypatch, engine), statements
+
+
+def test_reads_go_to_replica_until_client_writes(client, db_session, replica):
+    router, statements = replica
+
+    assert client.get("/api/reservations/").json() == []
+    assert statements, "listing should have been served by the replica"
+
+    response = client.post("/api/reservations/", json={
+        "name": "Ada", "email": "ada@example.com", "phone": "1",
+        "date": "2099-01-01", "time": "19:00", "guests": 2
+    })
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.cookies
+
+    # Read-your-writes: the client's next read goes to the primary
+    statements.clear()
+    assert len(client.get("/api/reservations/").json()) == 1
+    assert statements == []
+
+    client.cookies.clear()
+    client.get("/api/reservations/")
+    assert statements
+
+
+def test_read_your_writes_header_pins_reads_without_cookies(client, db_session, replica):
+    router, statements = replica
+    response = client.post("/api/reservations/", json={
+        "name": "Ada", "email": "ada@example.com", "phone": "1",
+        "date": "2099-01-01", "time": "19:00", "guests": 2
+    })
+    deadline = response.headers[STICKY_HEADER]
+    client.cookies.clear()
+
+    statements.clear()
+    client.get("/api/reservations/", headers={STICKY_HEADER: deadline})
+    assert statements == []
+    client.get("/api/reservations/", headers={STICKY_HEADER: "0"})
+    assert statements
+
+
+def test_tracking_an_order_the_replica_lacks_reads_the_primary(client, db_session, sample_menu_item, monkeypatch):
+    # An empty database stands in for a replica that hasn't caught up
+    path = os.path.join(tempfile.mkdtemp(), "replica.db")
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    use_replica(monkeypatch, create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+
+    order = client.post("/api/orders/guest", json={
+        "table_number": 2, "items": [{"menu_item_id": sample_menu_item.id, "quantity": 1}]
+    }).json()
+    client.cookies.clear()
+
+    response = client.get(f"/api/orders/track/{order['order_number']}")
+    assert response.status_code == 200
+    assert response.json()["id"] == order["id"]
+    assert client.get("/api/orders/track/ORD-MISSING").status_code == 404
+
+
+def test_unreachable_replica_falls_back_to_primary(client, db_session, monkeypatch):
+    missing = os.path.join(tempfile.mkdtemp(), "no-such-dir", "replica.db")
+    router = use_replica(monkeypatch, create_async_engine(f"sqlite+aiosqlite:///{missing}", poolclass=NullPool))
+
+    assert client.get("/api/tables/").status_code == 200
+    assert router.lag is None
+
+
+def test_lagging_replica_falls_back_to_primary(client, db_session, replica):
+    router, statements = replica
+    router.reported_lag = 30
+
+    assert client.get("/api/tables/").status_code == 200
+    assert statements == []
+
+    router.reported_lag = 0.5
+    assert client.get("/api/tables/").status_code == 200
+    assert statements
+
+
+def test_failed_write_does_not_pin_reads(client, db_session, replica):
+    response = client.post("/api/reservations/", json={
+        "name": "Ada", "email": "ada@example.com", "phone": "1",
+        "date": "2000-01-01", "time": "19:00", "guests": 2
+    })
+    assert response.status_code >= 400
+    assert STICKY_COOKIE not in response.cookies
+
+
+def test_tracking_cache_skips_replica_reads_of_fresh_writes():
+    cache = TrackingCache(ttl_seconds=30)
+    cache.invalidate("ORD-1")
+    _, generation = cache.get("ORD-1")
+
+    # A replica up to 5s behind may not have the write yet
+    cache.put("ORD-1", {"status": "pending"}, generation, read_lag=5)
+    assert cache.get("ORD-1")[0] is None
+
+    _, generation = cache.get("ORD-1")
+    cache.put("ORD-1", {"status": "ready"}, generation)
+    assert cache.get("ORD-1")[0] == {"status": "ready"}
@@ -0,0 +1,94 @@
+# tests/test_refresh_tokens.py
+"""
+Refresh-token rotation, reuse detection and logout tests.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+
+from app.models import RefreshToken
+from app.utils.password_hashing import password_hasher
+from app.utils.refresh_tokens import refresh_token_store
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def login(client):
+    response = client.post("/api/auth/login", json={"email": "customer@test.com", "password": "customer123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def count_tokens(db_session):
+    db_session.expire_all()
+    return db_session.scalar(select(func.count()).select_from(RefreshToken))
+
+
+def test_refresh_rotates_without_hashing(client, customer_user):
+    tokens = login(client)
+    hashed_before = password_hasher.stats()["completed"]
+
+    response = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+    assert password_hasher.stats()["completed"] == hashed_before
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {refreshed['access_token']}"})
+    assert me.json()["email"] == "customer@test.com"
+
+
+def test_reusing_a_spent_token_revokes_the_login(client, db_session, customer_user):
+    first = login(client)["refresh_token"]
+    other_login = login(client)["refresh_token"]
+    second = client.post("/api/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    assert client.post("/api/auth/refresh", json={"refresh_token": first}).status_code == 401
+    # The replay killed every rotation of that login, but not the other login
+    assert client.post("/api/auth/refresh", json={"refresh_token": second}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": other_login}).status_code == 200
+
+
+def test_logout_revokes_refresh_token(client, db_session, customer_user):
+    refresh_token = login(client)["refresh_token"]
+    assert count_tokens(db_session) == 1
+
+    assert client.post("/api/auth/logout", json={"refresh_token": refresh_token}).status_code == 200
+    assert count_tokens(db_session) == 0
+    assert client.post("/api/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+
+
+def test_logout_without_a_body_still_succeeds(client, db_session, customer_user):
+    refresh_token = login(client)["refresh_token"]
+
+    response = client.post("/api/auth/logout")
+    assert response.status_code == 200
+    assert response.json() == {"message": "Successfully logged out"}
+    # Nothing to revoke without the token
+    assert client.post("/api/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+
+def test_deactivated_user_cannot_refresh(client, admin_token, customer_user):
+    refresh_token = login(client)["refresh_token"]
+    client.put(
+        f"/api/auth/users/{customer_user.id}/access",
+        json={"is_active": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert client.post("/api/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+
+def test_expired_tokens_are_rejected_and_swept(client, db_session, customer_user):
+    refresh_token = login(client)["refresh_token"]
+    db_session.execute(update(RefreshToken).values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    db_session.commit()
+    assert client.post("/api/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+    async def sweep():
+        refresh_token_store._last_sweep = float("-inf")
+        async with TestingAsyncSessionLocal() as db:
+            await refresh_token_store._sweep(db)
+            await db.commit()
+
+    asyncio.run(sweep())
+    assert count_tokens(db_session) == 0
@@ -0,0 +1,75 @@
+# tests/test_token_claims.py
+"""
+Claims-based authorization and token revocation tests.
+"""
+from jose import jwt
+
+from app.config import settings
+from app.utils.auth import create_access_token
+
+
+def test_token_carries_id_role_and_version(customer_user, customer_token):
+    claims = jwt.decode(customer_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert claims["sub"] == customer_user.email
+    assert claims["uid"] == customer_user.id
+    assert claims["role"] == "customer"
+    assert claims["ver"] == 0
+
+
+def test_claims_authorize_without_loading_the_user(client, admin_token, query_counter):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    query_counter.clear()
+    assert client.get("/api/orders/track-cache/stats", headers=headers).status_code == 200
+    # Only the narrow version check, and only until it is cached
+    assert len(query_counter) == 1
+    assert "token_version" in query_counter[0]
+
+    query_counter.clear()
+    assert client.get("/api/orders/track-cache/stats", headers=headers).status_code == 200
+    assert query_counter == []
+
+
+def test_demotion_revokes_issued_tokens(client, admin_token, admin_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert client.get("/api/orders/track-cache/stats", headers=headers).status_code == 200
+
+    response = client.put(f"/api/auth/users/{admin_user.id}/access", json={"role": "staff"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "staff"
+
+    assert client.get("/api/orders/track-cache/stats", headers=headers).status_code == 401
+
+    new_token = client.post("/api/auth/login", json={"email": "admin@test.com", "password": "admin123"}).json()["access_token"]
+    response = client.get("/api/orders/track-cache/stats", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == 403
+
+
+def test_deactivation_revokes_and_blocks_login(client, admin_token, customer_user, customer_token):
+    customer = {"Authorization": f"Bearer {customer_token}"}
+    assert client.get("/api/orders/my-orders", headers=customer).status_code == 200
+
+    response = client.put(
+        f"/api/auth/users/{customer_user.id}/access",
+        json={"is_active": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/orders/my-orders", headers=customer).status_code == 401
+    response = client.post("/api/auth/login", json={"email": "customer@test.com", "password": "customer123"})
+    assert response.status_code == 400
+
+
+def test_access_update_is_admin_only(client, customer_user, customer_token):
+    response = client.put(
+        f"/api/auth/users/{customer_user.id}/access",
+        json={"role": "admin"},
+        headers={"Authorization": f"Bearer {customer_token}"}
+    )
+    assert response.status_code == 403
+
+
+def test_tokens_without_claims_still_resolve(client, customer_user):
+    token = create_access_token(data={"sub": customer_user.email})
+    response = client.get("/api/orders/my-orders", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
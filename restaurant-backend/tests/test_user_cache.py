@@ -0,0 +1,50 @@
+# tests/test_user_cache.py
+"""
+Cached user resolution tests (database mode: tokens resolved through the user cache).
+"""
+import pytest
+
+from app.config import settings
+from app.utils.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def database_auth(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", False)
+
+
+def test_repeated_requests_resolve_user_from_cache(client, customer_token, query_counter):
+    headers = {"Authorization": f"Bearer {customer_token}"}
+    client.get("/api/orders/my-orders", headers=headers)
+
+    query_counter.clear()
+    response = client.get("/api/orders/my-orders", headers=headers)
+    assert response.status_code == 200
+    assert not [statement for statement in query_counter if "FROM users" in statement]
+    assert user_cache.stats()["hits"] >= 1
+
+
+def test_profile_update_invalidates_and_me_loads_full_row(client, customer_token):
+    headers = {"Authorization": f"Bearer {customer_token}"}
+    assert client.get("/api/auth/me", headers=headers).json()["full_name"] == "Customer User"
+
+    response = client.put("/api/auth/profile", json={"full_name": "Renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert user_cache.get("customer@test.com")[0] is None
+
+    me = client.get("/api/auth/me", headers=headers).json()
+    assert me["full_name"] == "Renamed"
+    assert me["email"] == "customer@test.com"
+
+
+def test_deactivation_is_seen_after_invalidate(client, db_session, customer_user, customer_token):
+    headers = {"Authorization": f"Bearer {customer_token}"}
+    assert client.get("/api/orders/my-orders", headers=headers).status_code == 200
+
+    customer_user.is_active = False
+    db_session.commit()
+    # Still served from the cache until the writer invalidates the entry
+    assert client.get("/api/orders/my-orders", headers=headers).status_code == 200
+
+    user_cache.invalidate(customer_user.email)
+    assert client.get("/api/orders/my-orders", headers=headers).status_code == 400
@@ -0,0 +1,67 @@
+# tests/test_websocket.py
+"""
+ConnectionManager fan-out tests.
+"""
+import asyncio
+import json
+
+from app.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def test_broadcast_order_updates_coalesces_admin_messages_only():
+    manager = ConnectionManager()
+    admin, table_one, table_two = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+    async def main():
+        await manager.connect(admin, "admin")
+        await manager.connect(table_one, "customer")
+        await manager.connect(table_two, "customer")
+        manager.subscribe_to_order(table_one, 1)
+        manager.subscribe_to_order(table_one, 2)
+        manager.subscribe_to_order(table_two, 3)
+        await manager.broadcast_order_updates([
+            {"id": order_id, "status": "ready"} for order_id in (1, 2, 3, 4)
+        ])
+
+    asyncio.run(main())
+
+    assert len(admin.sent) == 1 and len(admin.sent[0]["orders"]) == 4
+    # Subscribers keep getting the single-order message the tracking page handles
+    assert [(message["type"], message["order"]["id"]) for message in table_one.sent] == [
+        ("order_status_updated", 1), ("order_status_updated", 2)
+    ]
+    assert [message["order"]["id"] for message in table_two.sent] == [3]
+
+
+def test_broadcast_to_all_reaches_every_connection_once():
+    manager = ConnectionManager()
+    admin, customer, gone = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+    async def fail(text):
+        raise RuntimeError("closed")
+
+    async def main():
+        await manager.connect(admin, "admin")
+        await manager.connect(customer, "customer")
+        await manager.connect(gone, "customer")
+        gone.send_text = fail
+        await manager.broadcast_to_all({"type": "menu_availability_updated", "item_ids": [1, 2], "is_available": False})
+
+    asyncio.run(main())
+
+    assert admin.sent == customer.sent == [{"type": "menu_availability_updated", "item_ids": [1, 2], "is_available": False}]
+    assert gone not in manager.active_connections["all"]
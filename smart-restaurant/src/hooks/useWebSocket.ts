@@ -64,14 +64,19 @@ export const useOrderUpdates = (onUpdate: (order: any) => void) => {
     const handleOrderUpdate = (data: any) => {
       if (data.type === 'order_status_updated' || data.type === 'new_order') {
         onUpdate(data.order);
+      } else if (data.type === 'orders_status_updated') {
+        // Bulk status changes arrive as one message listing every order
+        data.orders.forEach(onUpdate);
       }
     };
 
     on('order_status_updated', handleOrderUpdate);
+    on('orders_status_updated', handleOrderUpdate);
     on('new_order', handleOrderUpdate);
 
     return () => {
       off('order_status_updated', handleOrderUpdate);
+      off('orders_status_updated', handleOrderUpdate);
       off('new_order', handleOrderUpdate);
     };
   }, [on, off, onUpdate]);
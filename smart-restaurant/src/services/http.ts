@@ -13,6 +13,12 @@ const httpClient: AxiosInstance = axios.create({
   timeout: 30000,
 });
 
+// Read-your-writes: after a write the API returns a deadline until which
+// this client's reads must go to the primary database. Cookies don't survive
+// cross-origin calls without credentials, so echo it back as a header.
+const PRIMARY_READS_HEADER = 'X-Primary-Reads-Until';
+const PRIMARY_READS_KEY = 'primaryReadsUntil';
+
 // Request interceptor - attach token
 httpClient.interceptors.request.use(
   (config: InternalAxiosRequestConfig) => {
@@ -20,6 +26,14 @@ httpClient.interceptors.request.use(
     if (token && config.headers) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    const primaryReadsUntil = sessionStorage.getItem(PRIMARY_READS_KEY);
+    if (primaryReadsUntil && config.headers) {
+      if (Number(primaryReadsUntil) * 1000 > Date.now()) {
+        config.headers[PRIMARY_READS_HEADER] = primaryReadsUntil;
+      } else {
+        sessionStorage.removeItem(PRIMARY_READS_KEY);
+      }
+    }
     return config;
   },
   (error) => Promise.reject(error)
@@ -27,7 +41,13 @@ httpClient.interceptors.request.use(
 
 // Response interceptor - handle errors
 httpClient.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const primaryReadsUntil = response.headers[PRIMARY_READS_HEADER.toLowerCase()];
+    if (primaryReadsUntil) {
+      sessionStorage.setItem(PRIMARY_READS_KEY, primaryReadsUntil);
+    }
+    return response;
+  },
   async (error: AxiosError) => {
     if (error.response?.status === 401) {
       // Handle unauthorized - clear token and redirect to login